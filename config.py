@@ -27,6 +27,12 @@ MOVIE_VOICEOVER_RATIO = 0.40  # 40%解说
 # 最低原声保留比例
 MIN_ORIGINAL_RATIO = 0.25  # 至少25%原声
 
+# Ollama并发请求数（需同时在Ollama服务端设置 OLLAMA_NUM_PARALLEL 才会真正并行）
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+
+# Ollama模型常驻时长（覆盖整个处理流程，避免空闲卸载后重新加载）
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
 # ============================================================
 # TTS 配置
 # ============================================================
@@ -7,7 +7,7 @@ from .remove_silence import remove_silence
 from .transcribe import transcribe_video
 from .analyze_frames import CLIPAnalyzer
 from .generate_script import generate_narration_script, generate_narration_script_enhanced
-from .smart_cut import extract_clips, concat_clips, parse_keep_original_markers, VIDEO_ENCODER, select_best_clips
+from .smart_cut import extract_clips, concat_clips, extract_and_concat, parse_keep_original_markers, VIDEO_ENCODER, select_best_clips
 from .tts_synthesis import TTSEngine
 from .compose_video import compose_final_video, convert_to_douyin, add_subtitles
 from .auto_polish import apply_cinematic_filter
@@ -32,6 +32,7 @@ __all__ = [
     'generate_narration_script_enhanced',
     'extract_clips',
     'concat_clips',
+    'extract_and_concat',
     'parse_keep_original_markers',
     'VIDEO_ENCODER',
     'select_best_clips',
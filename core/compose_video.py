@@ -20,9 +20,18 @@ except ImportError:
 
 # 导入统一编码器
 try:
-    from .smart_cut import VIDEO_ENCODER
+    from .smart_cut import VIDEO_ENCODER, get_video_codec_args
 except ImportError:
-    from smart_cut import VIDEO_ENCODER
+    from smart_cut import VIDEO_ENCODER, get_video_codec_args
+
+# 抖音竖屏（9:16）缩放+黑边填充
+DOUYIN_VF = 'scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2:black'
+
+
+def _subtitles_vf(srt_path: str) -> str:
+    """硬字幕滤镜（处理路径中的特殊字符）"""
+    srt_path_escaped = srt_path.replace('\\', '/').replace(':', '\\:')
+    return f"subtitles='{srt_path_escaped}':force_style='FontSize=24,FontName=Microsoft YaHei'"
 
 
 def compose_final_video(
@@ -177,13 +186,10 @@ def add_subtitles(video_path: str, srt_path: str, output_path: str):
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
     
-    # 处理路径中的特殊字符
-    srt_path_escaped = srt_path.replace('\\', '/').replace(':', '\\:')
-    
     cmd = [
         'ffmpeg', '-y',
         '-i', video_path,
-        '-vf', f"subtitles='{srt_path_escaped}':force_style='FontSize=24,FontName=Microsoft YaHei'",
+        '-vf', _subtitles_vf(srt_path),
         '-c:a', 'copy',
         '-loglevel', 'error',
         output_path
@@ -196,34 +202,56 @@ def add_subtitles(video_path: str, srt_path: str, output_path: str):
         print(f"[WARNING] 字幕添加失败: {result.stderr[:100] if result.stderr else 'unknown'}")
 
 
-def convert_to_douyin(input_path: str, output_path: str):
-    """转换为抖音竖屏格式（9:16）"""
+def convert_to_douyin(
+    input_path: str,
+    output_path: str,
+    srt_path: str = None,
+    copy_audio: bool = False,
+    soft_subtitles: bool = False
+):
+    """
+    转换为抖音竖屏格式（9:16）
+    
+    传入 srt_path 时在同一次编码里先烧录字幕再缩放，
+    省去 add_subtitles 单独一遍解码+编码和中间文件；
+    soft_subtitles=True 时不烧录，字幕以 mov_text 软字幕轨封装进 MP4；
+    输入音轨已是 AAC（如 compose_final_video 的输出）时可设 copy_audio，只重编码视频
+    """
     output_dir = os.path.dirname(output_path)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
     
-    # 优先尝试 GPU 编码
-    encoder = VIDEO_ENCODER if VIDEO_ENCODER else 'libx264'
+    burn = srt_path and not soft_subtitles
+    vf = f"{_subtitles_vf(srt_path)},{DOUYIN_VF}" if burn else DOUYIN_VF
     
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', input_path,
-        '-vf', 'scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2:black',
-        '-c:v', encoder,
-        '-preset', 'fast',
-        '-c:a', 'aac',
-        '-b:v', '8M',
-        '-loglevel', 'error',
-        output_path
-    ]
+    input_args = ['-i', input_path]
+    if srt_path and soft_subtitles:
+        input_args += [
+            '-i', srt_path,
+            '-map', '0:v:0', '-map', '0:a?', '-map', '1:0',
+            '-c:s', 'mov_text', '-metadata:s:s:0', 'language=chi',
+        ]
+    
+    def build_cmd(video_codec_args):
+        return ['ffmpeg', '-y'] + input_args + [
+            '-vf', vf,
+        ] + video_codec_args + (
+            [] if '-b:v' in video_codec_args else ['-b:v', '8M']  # 编码参数已带码率时不重复指定
+        ) + [
+            '-c:a', 'copy' if copy_audio else 'aac',
+            '-loglevel', 'error',
+            output_path
+        ]
     
+    # 优先尝试 GPU 编码（各硬件编码器的参数由 gpu_encoder 统一给出）
+    cmd = build_cmd(get_video_codec_args('fast'))
     result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
     
     # 如果 GPU 失败，尝试 CPU
     if not os.path.exists(output_path) or os.path.getsize(output_path) < 1000:
-        if encoder != 'libx264':
+        if VIDEO_ENCODER and VIDEO_ENCODER != 'libx264':
             print("   [INFO] GPU编码失败，使用CPU...")
-            cmd[cmd.index(encoder)] = 'libx264'
+            cmd = build_cmd(['-c:v', 'libx264', '-preset', 'fast'])
             result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
     
     if os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
@@ -6,6 +6,7 @@ SmartVideoClipper - GPU硬件加速支持
 - NVIDIA NVENC (推荐，速度最快)
 - Intel QSV (Intel核显)
 - AMD AMF (AMD显卡)
+- Apple VideoToolbox (macOS)
 - 软件编码 (fallback)
 
 性能对比（1080p视频）：
@@ -32,6 +33,7 @@ class GPUEncoder:
         ('h264_nvenc', 'NVIDIA NVENC'),      # NVIDIA显卡
         ('h264_qsv', 'Intel QuickSync'),     # Intel核显
         ('h264_amf', 'AMD AMF'),             # AMD显卡
+        ('h264_videotoolbox', 'Apple VideoToolbox'),  # macOS
         ('libx264', 'CPU软件编码'),           # 软件编码（fallback）
     ]
     
@@ -110,6 +112,13 @@ class GPUEncoder:
             else:
                 return ['-c:v', 'h264_amf', '-quality', 'quality']
         
+        elif encoder == 'h264_videotoolbox':
+            # Apple VideoToolbox（不支持 preset，用码率控制质量）
+            if quality == 'fast':
+                return ['-c:v', 'h264_videotoolbox', '-b:v', '8M']
+            else:
+                return ['-c:v', 'h264_videotoolbox', '-b:v', '12M']
+        
         else:
             # libx264 软件编码
             if quality == 'fast':
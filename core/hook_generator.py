@@ -12,6 +12,7 @@ SmartVideoClipper - 钩子开场与悬念结尾生成器 v5.6
 - 悬念结尾：留白、期待、升华，引导继续观看
 """
 
+import os
 import sys
 import re
 from typing import Optional, Tuple
@@ -22,6 +23,12 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 模型常驻时长（与解说引擎一致，多个阶段之间不重复加载模型）
+try:
+    from config import OLLAMA_KEEP_ALIVE
+except ImportError:
+    OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
 
 def log(msg: str):
     """统一日志输出"""
@@ -288,7 +295,8 @@ class HookGenerator:
                 options={
                     'num_predict': 150,
                     'temperature': 0.7,
-                }
+                },
+                keep_alive=OLLAMA_KEEP_ALIVE
             )
             
             # v5.7.3: 只从content提取，绝不使用thinking
@@ -440,7 +448,8 @@ class HookGenerator:
                 options={
                     'num_predict': 150,
                     'temperature': 0.5,
-                }
+                },
+                keep_alive=OLLAMA_KEEP_ALIVE
             )
             
             # v5.7.3: 只从content提取，绝不使用thinking
@@ -29,10 +29,25 @@ v5.5基础保留：
 import os
 import sys
 import re
+import json
+import time
+import functools
+import heapq
+import operator
+import threading
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict, deque
+from itertools import accumulate
+
+try:
+    import ollama
+except ImportError:
+    ollama = None
 
 # 添加项目路径
 project_root = Path(__file__).parent.parent
@@ -53,10 +68,198 @@ except ImportError:
     MOVIE_VOICEOVER_RATIO = 0.40
     MIN_ORIGINAL_RATIO = 0.25
 
+try:
+    from config import OLLAMA_NUM_PARALLEL, OLLAMA_KEEP_ALIVE
+except ImportError:
+    OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+    OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+def log(msg: str):
+    """统一日志输出"""
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+
+
+# 相似解说判定阈值（4字片段集合的Jaccard相似度）
+DUPLICATE_SIMILARITY = 0.6
+
+# AI兜底生成缓存（进程内）：重复台词、多集处理时的相同对话直接复用，不再调用AI
+NARRATION_CACHE_SIZE = 4096
+
+
+class NarrationCache:
+    """
+    LRU缓存：键为(生成方式, 模型, 规范化后的对话)，只缓存成功结果
+    
+    目前只用于单条对话的AI概括（_ai_summarize_dialogue），
+    该兜底会在线程池中并发调用，读写加锁
+    """
+    
+    def __init__(self, maxsize: int = NARRATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(kind: str, model: str, dialogue: str, limit: int) -> Tuple[str, str, str]:
+        """prompt只用对话前limit字，按截断并压缩空白后的文本作键"""
+        return (kind, model, " ".join(dialogue[:limit].split()))
+    
+    def get(self, key: Tuple[str, str, str]) -> str:
+        with self._lock:
+            value = self._data.get(key, "")
+            if value:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: Tuple[str, str, str], value: str):
+        if not value:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # 淘汰最久未使用的条目
+
+
+_narration_cache = NarrationCache()
+
+
+def response_content(response) -> str:
+    """
+    提取Ollama响应的content（去除首尾空白），绝不使用thinking字段
+    
+    旧版客户端返回dict，新版返回可下标访问的响应对象，两者都支持.get()；
+    空响应（如safe_ollama_chat失败时的{}）返回空字符串
+    """
+    msg = (response or {}).get('message') or {}
+    return (msg.get('content') or '').strip()
+
+
+def read_stream(stream, should_stop=None) -> str:
+    """
+    读取流式Ollama响应的content（去除首尾空白），绝不使用thinking字段
+    
+    should_stop(已接收内容, 本次片段)返回True时提前停止，不必等生成跑满num_predict；
+    关闭生成器即断开连接，Ollama随之停止生成
+    """
+    content = ""
+    try:
+        for chunk in stream:
+            piece = (chunk.get('message') or {}).get('content')
+            if piece:
+                content += piece
+                if should_stop and should_stop(content, piece):
+                    break
+    finally:
+        if hasattr(stream, 'close'):
+            stream.close()
+    return content.strip()
+
+
+def sentence_stop(min_len: int):
+    """流式短句生成的停止条件：够长（超过min_len）且以句末标点结尾即停止"""
+    def should_stop(content: str, piece: str) -> bool:
+        stripped = content.strip()
+        return len(stripped) > min_len and stripped[-1] in '。！？'
+    return should_stop
+
+
+# qwen3等混合推理模型：system消息中的/no_think关闭思考模式，content直接给出结果
+NO_THINK_SYSTEM_PROMPT = "/no_think 直接输出结果，不要输出思考过程。"
+
+
+def build_messages(model: Optional[str], prompt: str, system: str = "") -> list:
+    """
+    构建单轮对话消息，qwen3系列模型额外加上关闭思考的system消息
+    
+    system为固定指令时放在最前面、prompt只放变化的内容，
+    各次调用共享相同前缀，Ollama可复用已计算的KV缓存
+    """
+    messages = [{'role': 'user', 'content': prompt}]
+    system_parts = []
+    if model and model.lower().startswith('qwen3'):
+        system_parts.append(NO_THINK_SYSTEM_PROMPT)
+    if system:
+        system_parts.append(system)
+    if system_parts:
+        messages.insert(0, {'role': 'system', 'content': "\n".join(system_parts)})
+    return messages
+
+
+# 各类调用的生成选项（每次调用都相同，共用同一对象；调用方不得修改）
+_OPTS_WARMUP = {'num_predict': 1}
+_OPTS_CONTEXT_BATCH = {'num_predict': 2000, 'temperature': 0.6}
+_OPTS_BATCH = {
+    'num_predict': 2000,  # 充足的生成空间
+    'temperature': 0.5,   # 降低随机性，提高成功率
+}
+_OPTS_SUMMARIZE = {'num_predict': 100, 'temperature': 0.5}
+_OPTS_PLOT_SUMMARY = {'num_predict': 500, 'temperature': 0.3}
+
+# 对话概括的固定指令（system消息），user消息只包含对话本身
+SUMMARY_INSTRUCTION = "概括用户给出的对话（15字内），直接输出概括："
+BATCH_SUMMARY_INSTRUCTION = """为用户给出的每段对话各生成一句概括（每句15字左右）。
+
+只输出JSON数组，格式：["概括1", "概括2", ...]
+禁止输出思考过程、"好的"、"首先"等"""
+
+
+@functools.lru_cache(maxsize=16)
+def batch_system_prompt(title: str, plot_summary: str, style: str) -> str:
+    """批量解说的system消息：作品、剧情和风格在一集内固定，每种组合只构建一次"""
+    return f"""你是专业的影视解说员，为《{title}》生成解说词。
+
+【整体剧情】{plot_summary}
+
+【生成要求】
+- 每条解说25-35字，具体描述剧情发展
+- {style}
+- 突出关键人物和事件转折
+
+【输出格式】
+每行一个解说，用数字编号：
+1. [场景1的具体解说，突出关键细节]
+2. [场景2的详细描述，展现人物关系]"""
+
+
+# 可重试的瞬时错误：连接失败/超时，以及Ollama排队繁忙、服务端错误
+try:
+    import httpx
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+OLLAMA_RETRY_ATTEMPTS = 3
+BATCH_ERROR_BACKOFF = 2  # 批次调用异常后，下一批开始前的退避时间（秒）
+OLLAMA_LIST_TIMEOUT = 2  # 查询模型列表的超时（秒），服务不可达时不卡住启动
+_BUSY_STATUS = (429, 503)
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    瞬时错误返回第attempt次重试前的等待秒数（指数退避，最多4秒），其他错误返回None
+    
+    服务端排队繁忙（429/503）时退避加倍
+    """
+    status = getattr(error, 'status_code', None)
+    if ollama is not None and isinstance(error, ollama.ResponseError):
+        if status not in _BUSY_STATUS and not (status and status >= 500):
+            return None
+    elif not isinstance(error, _TRANSIENT_ERRORS):
+        return None
+    
+    delay = min(0.5 * 2 ** attempt, 4.0)
+    if status in _BUSY_STATUS:
+        delay *= 2
+    return delay
+
+
 # v5.9新增：带异常处理的Ollama调用辅助函数
 def safe_ollama_chat(model: str, messages: list, options: dict = None, context: str = "") -> dict:
     """
-    安全的Ollama调用，带GPU异常处理和自动降级
+    安全的Ollama调用，带瞬时错误重试、GPU异常处理和自动降级
+
+    连接失败、超时、服务繁忙等瞬时错误按指数退避重试，重试用尽再走降级逻辑
 
     Args:
         model: 模型名称
@@ -67,48 +270,77 @@ def safe_ollama_chat(model: str, messages: list, options: dict = None, context:
     Returns:
         Ollama响应字典，失败时返回空字典
     """
-    import ollama
+    if ollama is None:
+        return {}
 
     if options is None:
         options = {'num_predict': 1000, 'temperature': 0.5}
 
-    try:
-        response = ollama.chat(
-            model=model,
-            messages=messages,
-            options=options
-        )
-        return response
-    except Exception as e:
-        error_msg = str(e).lower()
-        context_info = f" ({context})" if context else ""
-
-        if 'cuda' in error_msg or 'out of memory' in error_msg or 'gpu' in error_msg:
-            print(f"[GPU v5.9] 🚨 显存不足错误{context_info}: {e}")
-
-            # 尝试降级到CPU模式
-            if GPU_MANAGER_AVAILABLE:
-                print(f"[GPU v5.9] 尝试CPU降级{context_info}...")
-                try:
-                    cpu_options = options.copy()
-                    cpu_options['num_gpu'] = 0  # 强制CPU模式
-
-                    response = ollama.chat(
-                        model=model,
-                        messages=messages,
-                        options=cpu_options
-                    )
-                    print(f"[GPU v5.9] ✅ CPU降级成功{context_info}")
-                    return response
-                except Exception as cpu_error:
-                    print(f"[GPU v5.9] ❌ CPU降级失败{context_info}: {cpu_error}")
-            else:
-                print(f"[GPU v5.9] GPU管理器不可用{context_info}")
+    context_info = f" ({context})" if context else ""
+    for attempt in range(OLLAMA_RETRY_ATTEMPTS):
+        try:
+            return ollama.chat(
+                model=model,
+                messages=messages,
+                options=options,
+                keep_alive=OLLAMA_KEEP_ALIVE
+            )
+        except Exception as e:
+            error = e
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt == OLLAMA_RETRY_ATTEMPTS - 1:
+                break
+            print(f"[ollama] 瞬时错误{context_info}，{delay:.1f}秒后重试({attempt + 1}/{OLLAMA_RETRY_ATTEMPTS - 1}): {e}", flush=True)
+            time.sleep(delay)
+
+    error_msg = str(error).lower()
+
+    if 'cuda' in error_msg or 'out of memory' in error_msg or 'gpu' in error_msg:
+        print(f"[GPU v5.9] 🚨 显存不足错误{context_info}: {error}")
+
+        # 尝试降级到CPU模式
+        if GPU_MANAGER_AVAILABLE:
+            print(f"[GPU v5.9] 尝试CPU降级{context_info}...")
+            try:
+                cpu_options = options.copy()
+                cpu_options['num_gpu'] = 0  # 强制CPU模式
+
+                response = ollama.chat(
+                    model=model,
+                    messages=messages,
+                    options=cpu_options,
+                    keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                print(f"[GPU v5.9] ✅ CPU降级成功{context_info}")
+                return response
+            except Exception as cpu_error:
+                print(f"[GPU v5.9] ❌ CPU降级失败{context_info}: {cpu_error}")
         else:
-            print(f"[AI] 调用异常{context_info}: {e}")
+            print(f"[GPU v5.9] GPU管理器不可用{context_info}")
+    else:
+        print(f"[AI] 调用异常{context_info}: {error}")
 
     return {}
 
+# v5.8.1: orjson可选加速（解析模型输出的JSON），不可用时退回标准库
+try:
+    import orjson
+    json_loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    json_loads = json.loads
+    ORJSON_AVAILABLE = False
+
+# 解说模型优先级（越靠前越优先）
+LLM_PRIORITY = ['qwen3', 'qwen2.5', 'qwen', 'llama3', 'gemma', 'mistral']
+
+
+def _llm_priority_rank(name: str) -> int:
+    """模型名命中的最高优先级下标，都不命中返回len(LLM_PRIORITY)"""
+    lowered = name.lower()
+    return next((i for i, p in enumerate(LLM_PRIORITY) if p in lowered), len(LLM_PRIORITY))
+
+
 # v5.6新增：导入新模块
 try:
     from core.story_framework import StoryFrameworkGenerator, FrameworkSegment
@@ -119,12 +351,97 @@ try:
 except ImportError:
     MODULES_V56_AVAILABLE = False
 
+
+# 子模块实例按参数缓存，多集处理时复用（子模块不保存分集状态，所需上下文均通过参数传入）
+# 只缓存解析出LLM模型的实例：Ollama暂不可用时构造出的无模型实例不缓存，下次构造引擎时重试
+_submodule_cache: Dict[Tuple[str, Optional[str]], object] = {}
+
+
+def _cached_submodule(kind: str, model: Optional[str], factory):
+    key = (kind, model)
+    instance = _submodule_cache.get(key)
+    if instance is None:
+        instance = factory(model)
+        if instance.llm_model:
+            # 并发构造时以先写入的实例为准
+            instance = _submodule_cache.setdefault(key, instance)
+    return instance
+
+
+def _get_framework_generator(model: Optional[str]) -> "StoryFrameworkGenerator":
+    return _cached_submodule('framework', model, StoryFrameworkGenerator)
+
+
+def _get_silence_handler(model: Optional[str]) -> "SilenceHandler":
+    return _cached_submodule('silence', model, SilenceHandler)
+
+
+def _get_hook_generator(model: Optional[str]) -> "HookGenerator":
+    return _cached_submodule('hook', model, HookGenerator)
+
+
+@functools.cache
+def _get_ratio_calculator(media_type: str) -> "DynamicRatioCalculator":
+    return DynamicRatioCalculator(media_type)
+
 # 敏感词列表
 SENSITIVE_WORDS = [
     "习近平", "胡锦涛", "江泽民", "毛泽东", "邓小平", "温家宝", "李克强",
     "习主席", "总书记", "国家主席", "中央领导", "共产党", "国民党", 
     "民进党", "法轮功", "六四", "天安门", "台独", "藏独", "疆独", "港独",
 ]
+# 预编译为一个交替正则，一次扫描替换全部敏感词（长词优先）
+_SENSITIVE_RE = re.compile("|".join(map(re.escape, sorted(SENSITIVE_WORDS, key=len, reverse=True))))
+
+# 同一对话会在剧情理解和场景标记中各过滤一次，片头片尾台词也会跨场景/跨集重复，
+# 两个纯函数按文本缓存结果
+TEXT_FILTER_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=TEXT_FILTER_CACHE_SIZE)
+def _filter_sensitive_impl(text: str) -> str:
+    """过滤敏感词（删除内层词后可能拼出新的敏感词，重复替换直到不再变化）"""
+    if not text:
+        return ""
+    result = text
+    while True:
+        filtered = _SENSITIVE_RE.sub("", result)
+        if filtered == result:
+            return result.strip()
+        result = filtered
+
+
+# 广告特征模式
+AD_PATTERNS = [
+    r'用痛[﹔;]',
+    r'用经敌',
+    r'家中常备',
+    r'邀您观看',
+    r'教您观看',
+    r'巨颗话谈',
+    r'苦红利焉',
+    r'精通电子案',
+    r'穿被皮发膏',
+    r'赞助播出',
+    r'独家冠名',
+    r'[﹔;]{3,}',  # 连续分号（Whisper乱码特征）
+]
+# 合并为一个交替正则，一次search完成全部检测
+_AD_RE = re.compile("|".join(f"(?:{p})" for p in AD_PATTERNS))
+
+
+@functools.lru_cache(maxsize=TEXT_FILTER_CACHE_SIZE)
+def _is_ad_content_impl(text: str) -> bool:
+    """
+    v5.7.1：检测广告内容
+    """
+    if not text:
+        return False
+    
+    # 广告特征模式 + 高密度分号检测（广告乱码特征）
+    return (_AD_RE.search(text) is not None
+            or text.count('﹔') > 2 or text.count(';') > 3)
+
 
 # v5.8新增：Structured格式优化系统（100%成功率）
 STYLE_CONFIG = {
@@ -181,6 +498,31 @@ STYLE_CONFIG = {
 }
 
 
+# 特殊剧名直接映射
+TITLE_GENRE_MAP = {
+    '狂飙': 'crime',
+    '扫黑风暴': 'crime',
+    '破冰行动': 'crime',
+    '人民的名义': 'crime',
+    '巡回检察组': 'crime',
+    '隐秘的角落': 'crime',
+    '沉默的真相': 'crime',
+}
+_TITLE_GENRE_RE = re.compile("|".join(map(re.escape, TITLE_GENRE_MAP)))
+
+# 全部类型关键词合并为一个正则，一次扫描得到所有命中的关键词
+# 零宽先行断言允许关键词重叠匹配（如"涉黑帮"同时命中"涉黑"和"黑帮"）
+_KEYWORD_GENRES: Dict[str, List[str]] = defaultdict(list)
+for _genre, _config in STYLE_CONFIG.items():
+    if _genre == 'default':
+        continue
+    for _kw in _config.get('keywords', []):
+        _KEYWORD_GENRES[_kw].append(_genre)
+_GENRE_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(_KEYWORD_GENRES, key=len, reverse=True))) + "))"
+)
+
+
 def detect_video_genre(title: str, plot: str) -> str:
     """
     v5.8.0：Structured格式优化（100%成功率）
@@ -188,35 +530,22 @@ def detect_video_genre(title: str, plot: str) -> str:
     """
     text = f"{title} {plot}"  # 中文不需要lower()
     
-    # 特殊剧名直接映射
-    TITLE_GENRE_MAP = {
-        '狂飙': 'crime',
-        '扫黑风暴': 'crime',
-        '破冰行动': 'crime',
-        '人民的名义': 'crime',
-        '巡回检察组': 'crime',
-        '隐秘的角落': 'crime',
-        '沉默的真相': 'crime',
-    }
-    
     # 检查标题直接映射
-    for drama_name, genre in TITLE_GENRE_MAP.items():
-        if drama_name in title:
-            return genre
-    
-    # 计算每个类型的匹配分数
-    scores = {}
-    for genre, config in STYLE_CONFIG.items():
-        if genre == 'default':
-            continue
-        score = sum(1 for kw in config.get('keywords', []) if kw in text)
-        if score > 0:
-            scores[genre] = score
-    
-    if not scores:
+    match = _TITLE_GENRE_RE.search(title)
+    if match:
+        return TITLE_GENRE_MAP[match.group()]
+    
+    # 计算每个类型的匹配分数（每个关键词命中计1分，重复出现不重复计分）
+    hits = defaultdict(int)
+    for kw in set(_GENRE_KEYWORD_RE.findall(text)):
+        for genre in _KEYWORD_GENRES[kw]:
+            hits[genre] += 1
+    
+    if not hits:
         return 'default'
     
-    # 返回得分最高的类型
+    # 返回得分最高的类型（同分时按STYLE_CONFIG顺序取先出现的）
+    scores = {genre: hits[genre] for genre in STYLE_CONFIG if genre in hits}
     return max(scores, key=scores.get)
 
 
@@ -225,54 +554,6 @@ def get_optimal_style(genre: str) -> dict:
     return STYLE_CONFIG.get(genre, STYLE_CONFIG['default'])
 
 
-def safe_ollama_call(model: str, prompt: str, options: dict = None) -> str:
-    """
-    v5.8.0: Structured格式+统一的ollama调用，从根源确保100%成功率
-    
-    核心原则：
-    1. 只返回content内容
-    2. 绝不使用thinking字段
-    3. content为空返回空字符串
-    
-    参数：
-        model: 模型名称
-        prompt: 提示词
-        options: 额外选项
-        
-    返回：content字符串，不会包含thinking内容
-    """
-    try:
-        import ollama
-        
-        # 默认选项
-        default_options = {
-            'num_predict': 500,
-            'temperature': 0.5,
-        }
-        
-        if options:
-            default_options.update(options)
-        
-        response = ollama.chat(
-            model=model,
-            messages=[{'role': 'user', 'content': prompt}],
-            options=default_options
-        )
-        
-        # v5.8.0: Structured格式解析，绝不使用thinking
-        msg = response.get('message', {})
-        
-        if hasattr(msg, 'content') and msg.content:
-            return msg.content.strip()
-        
-        # content为空返回空字符串
-        return ""
-        
-    except Exception as e:
-        print(f"[ollama] 调用异常: {e}", flush=True)
-        return ""
-
-
 # 低质量内容检测 - 这些绝对不能作为解说出现！
 BAD_PATTERNS = [
     "紧张的场面", "紧张的一幕", "此刻紧张", "画面一转，紧张",
@@ -283,8 +564,74 @@ BAD_PATTERNS = [
     "重要场景", "关键场景", "这一幕",
     "解说文本", "解说词", "旁白",
 ]
+_BAD_PATTERN_RE = re.compile("|".join(map(re.escape, BAD_PATTERNS)))
 
 # v5.8.0新增：Structured格式+AI输出垃圾内容清洗
+# 以下正则在模块加载时编译一次，clean_narration_text/validate_narration每次调用直接复用
+
+# 第一阶段：以这些开头的文本视为AI思考内容
+_AI_THINKING_STARTS = (
+    '好的，', '好的,', '好的我', '好的 我',
+    '首先，', '首先,', '首先我',
+    '让我', '我来', '我需要', '我要',
+    '用户', '根据用户', '根据要求',
+    '原句', '这句话', '看起来',
+    '可能需要', '需要检查', '需要确认',
+    '接下来', '下面我', '现在我',
+)
+
+# 第二阶段：AI思考片段（按顺序逐个删除）
+_GARBAGE_RES = [re.compile(p, re.DOTALL) for p in [
+    # 完整句式 - 必须删除
+    r'好的[，,\s]*[我用].*?[。，,]',
+    r'用\d+个?字.*?描述[。，,]?',
+    r'原句[是为：:][^。]*[。]?',
+    r'这句话[是说可].*?[。，]',
+    r'看起来.*?[。，]',
+    r'可能[是需要].*?[。，]',
+    r'我需要.*?[。，]',
+    r'让我[来先].*?[。，]',
+    r'首先[，,]?.*?[。，]',
+    r'接下来[，,]?.*?[。，]',
+    r'根据[用要]户.*?[。，]',
+    r'用户[让想要].*?[。，]',
+    r'下面[是我].*?[。，]',
+    r'以下[是为].*?[。，]',
+    
+    # 关键词删除
+    r'用五个字',
+    r'用\d+个字',
+    r'\d+字[：:]',
+    r'[\[【]\d+字[\]】]',
+    r'检查是否',
+    r'确保.*?融入',
+    r'符合要求',
+    r'主要信息',
+    r'没有复述',
+    r'笑死',
+    r'快递',
+]]
+
+# 第三阶段：JSON残留
+_JSON_RESIDUE_RES = [re.compile(p) for p in [
+    r'"\d+字"\s*[：:]\s*"?',
+    r'^[\d]+[\.、]\s*',
+    r'",?\s*$',
+    r'^"',
+    r'"$',
+]]
+
+# 第四阶段：连续标点合并为一个（三类字符互不重叠，一次替换完成）
+_REPEATED_PUNCT_RE = re.compile(r'([，,]{2,})|([。.]{2,})|([！!]{2,})')
+_REPEATED_PUNCT_REPL = {1: '，', 2: '。', 3: '！'}
+_LEADING_PUNCT_RE = re.compile(r'^[，,。.！!\s]+')
+_TRAILING_COMMA_RE = re.compile(r'[，,]+$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 第五阶段：清洗后前15字仍含这些特征则丢弃
+_FINAL_CHECK_WORDS = ('好的', '首先', '我需要', '用户', '原句', '这句话', '看起来', '可能需要')
+
+
 def clean_narration_text(text: str) -> str:
     """
     清洗解说文本中的垃圾内容 v5.8.0（Structured格式增强版）
@@ -295,89 +642,83 @@ def clean_narration_text(text: str) -> str:
         return ""
     
     # ========== 第一阶段：检测并丢弃AI思考内容 ==========
-    # 如果整个文本看起来是AI思考，直接返回空
-    ai_thinking_starts = [
-        '好的，', '好的,', '好的我', '好的 我',
-        '首先，', '首先,', '首先我',
-        '让我', '我来', '我需要', '我要',
-        '用户', '根据用户', '根据要求',
-        '原句', '这句话', '看起来',
-        '可能需要', '需要检查', '需要确认',
-        '接下来', '下面我', '现在我',
-    ]
-    text_start = text[:20] if len(text) > 20 else text
-    for start in ai_thinking_starts:
-        if text_start.startswith(start):
-            # 整个文本可能是AI思考，尝试提取有效内容
-            # 查找最后一个引号后的内容，或者直接丢弃
-            return ""
+    # 如果整个文本看起来是AI思考，直接丢弃
+    if text[:20].startswith(_AI_THINKING_STARTS):
+        return ""
     
     # ========== 第二阶段：删除AI思考片段 ==========
-    garbage_patterns = [
-        # 完整句式 - 必须删除
-        r'好的[，,\s]*[我用].*?[。，,]',
-        r'用\d+个?字.*?描述[。，,]?',
-        r'原句[是为：:][^。]*[。]?',
-        r'这句话[是说可].*?[。，]',
-        r'看起来.*?[。，]',
-        r'可能[是需要].*?[。，]',
-        r'我需要.*?[。，]',
-        r'让我[来先].*?[。，]',
-        r'首先[，,]?.*?[。，]',
-        r'接下来[，,]?.*?[。，]',
-        r'根据[用要]户.*?[。，]',
-        r'用户[让想要].*?[。，]',
-        r'下面[是我].*?[。，]',
-        r'以下[是为].*?[。，]',
-        
-        # 关键词删除
-        r'用五个字',
-        r'用\d+个字',
-        r'\d+字[：:]',
-        r'[\[【]\d+字[\]】]',
-        r'检查是否',
-        r'确保.*?融入',
-        r'符合要求',
-        r'主要信息',
-        r'没有复述',
-        r'笑死',
-        r'快递',
-    ]
-    
-    for pattern in garbage_patterns:
-        text = re.sub(pattern, '', text, flags=re.DOTALL)
+    for pattern in _GARBAGE_RES:
+        text = pattern.sub('', text)
     
     # ========== 第三阶段：删除JSON残留 ==========
-    text = re.sub(r'"\d+字"\s*[：:]\s*"?', '', text)
-    text = re.sub(r'^[\d]+[\.、]\s*', '', text)
-    text = re.sub(r'",?\s*$', '', text)
-    text = re.sub(r'^"', '', text)
-    text = re.sub(r'"$', '', text)
+    for pattern in _JSON_RESIDUE_RES:
+        text = pattern.sub('', text)
     
     # ========== 第四阶段：清理标点 ==========
-    text = re.sub(r'[，,]{2,}', '，', text)
-    text = re.sub(r'[。.]{2,}', '。', text)
-    text = re.sub(r'[！!]{2,}', '！', text)
-    text = re.sub(r'^[，,。.！!\s]+', '', text)
-    text = re.sub(r'[，,]+$', '', text)
+    text = _REPEATED_PUNCT_RE.sub(lambda m: _REPEATED_PUNCT_REPL[m.lastindex], text)
+    text = _LEADING_PUNCT_RE.sub('', text)
+    text = _TRAILING_COMMA_RE.sub('', text)
     
     # ========== 第五阶段：最终检查 ==========
     text = text.strip()
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # 如果清洗后太短或仍包含AI思考特征，返回空
     if len(text) < 5:
         return ""
     
     # 最终检查是否仍有AI思考残留
-    final_check_patterns = ['好的', '首先', '我需要', '用户', '原句', '这句话', '看起来', '可能需要']
-    for p in final_check_patterns:
-        if p in text[:15]:
+    head = text[:15]
+    for p in _FINAL_CHECK_WORDS:
+        if p in head:
             return ""
     
     return text
 
 
+# v5.8.0: Structured格式+全面的垃圾内容检测
+_INVALID_PATTERNS = [
+    # AI思考过程
+    r'好的[，,\s]',
+    r'首先[，,\s]',
+    r'用户',
+    r'原句[是为]',
+    r'这句话',
+    r'看起来',
+    r'可能[是需要]',
+    r'我[来需要]',
+    r'让我',
+    r'接下来',
+    r'从给定',
+    r'根据[用要]',
+    r'下面[是我]',
+    r'以下[是为]',
+    r'最终可能',
+    r'不过用户',
+    r'需要保持',
+    r'或者[，,]?原',
+    
+    # 字数标记
+    r'\d+字[：:]',
+    r'[\[【]\d+字[\]】]',
+    r'约?\d+字',
+    
+    # 后期术语
+    r'不打码',
+    r'马赛克',
+    r'检查是否',
+    r'需要确认',
+    r'主要信息',
+    r'符合要求',
+    
+    # 网络用语
+    r'笑死',
+    r'快递',
+]
+# 合并为一个交替正则，一次search完成全部检测
+_INVALID_RE = re.compile("|".join(f"(?:{p})" for p in _INVALID_PATTERNS))
+
+
 def validate_narration(text: str) -> bool:
     """
     验证解说是否合格 v5.8.0（Structured格式增强版）
@@ -392,61 +733,111 @@ def validate_narration(text: str) -> bool:
         if len(text) < 15:  # 太短且没有标点，可能被截断
             return False
     
-    # v5.8.0: Structured格式+全面的垃圾内容检测
-    invalid_patterns = [
-        # AI思考过程
-        r'好的[，,\s]',
-        r'首先[，,\s]',
-        r'用户',
-        r'原句[是为]',
-        r'这句话',
-        r'看起来',
-        r'可能[是需要]',
-        r'我[来需要]',
-        r'让我',
-        r'接下来',
-        r'从给定',
-        r'根据[用要]',
-        r'下面[是我]',
-        r'以下[是为]',
-        r'最终可能',
-        r'不过用户',
-        r'需要保持',
-        r'或者[，,]?原',
-        
-        # 字数标记
-        r'\d+字[：:]',
-        r'[\[【]\d+字[\]】]',
-        r'约?\d+字',
-        
-        # 后期术语
-        r'不打码',
-        r'马赛克',
-        r'检查是否',
-        r'需要确认',
-        r'主要信息',
-        r'符合要求',
-        
-        # 网络用语
-        r'笑死',
-        r'快递',
-    ]
-    for pattern in invalid_patterns:
-        if re.search(pattern, text):
-            return False
+    if _INVALID_RE.search(text):
+        return False
     
     return True
 
 
+# 批量结果单行的最大原始长度（要求25-35字，超过80字多为思考过程或多句混杂）
+BATCH_LINE_MAX_CHARS = 80
+
+# 编号前缀正则（模块级预编译，批量解析时复用）
+_LIST_NUM_PREFIX_RE = re.compile(r'^[\d]+[\.、]\s*')
+_LINE_NUM_PREFIX_RE = re.compile(r'^[\d]+[\.、\)）]\s*')
+_NUMBERED_LINE_RE = re.compile(r'^(\d+)\.\s*(.+)$')
+
+
+def _find_array_end(s: str, start: int) -> int:
+    """
+    从start处的'['向后扫描，返回与之配对的']'下标，未闭合返回-1
+    
+    跟踪括号深度，并跳过字符串字面量（含反斜杠转义）里的括号
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _extract_json_array(s: str) -> Optional[list]:
+    """
+    v5.8.1: 单次前向扫描定位第一个完整JSON数组并解析
+    
+    取代原先三个回溯正则（贪婪[\\s\\S]*在长输出上最坏为平方复杂度），
+    某个'['开头的片段解析失败时从下一个'['继续，找不到返回None
+    """
+    start = s.find('[')
+    while start != -1:
+        end = _find_array_end(s, start)
+        if end != -1:
+            try:
+                data = json_loads(s[start:end + 1])
+            except ValueError:
+                data = None
+            if isinstance(data, list):
+                return data
+        start = s.find('[', start + 1)
+    return None
+
+
+def parse_json_narrations(content: str) -> List[str]:
+    """
+    从AI输出中提取JSON数组形式的解说列表 v5.8.0
+    
+    兼容嵌套数组、带编号的条目和JSON模式下的{"narrations": [...]}对象
+    （取其中第一个完整数组），解析失败返回空列表
+    """
+    results = _extract_json_array(content)
+    if results is None:
+        return []
+    
+    # 处理嵌套数组: [[...]] -> [...]
+    if len(results) == 1 and isinstance(results[0], list):
+        results = results[0]
+    
+    cleaned = []
+    for r in results:
+        if isinstance(r, str):
+            r = r.strip().strip('"\'')
+            r = _LIST_NUM_PREFIX_RE.sub('', r)
+            cleaned.append(r)
+        elif isinstance(r, list):  # 再次处理嵌套
+            for sub in r:
+                if isinstance(sub, str):
+                    cleaned.append(sub.strip())
+        else:
+            cleaned.append("")
+    
+    return cleaned
+
+
 class AudioMode(Enum):
     ORIGINAL = "original"    # 保留原声
     VOICEOVER = "voiceover"  # 使用解说
     SKIP = "skip"            # 跳过
 
 
-@dataclass
+@dataclass(slots=True)
 class SceneSegment:
-    """场景片段"""
+    """场景片段（slots：无实例__dict__，属性访问走槽位）"""
     scene_id: int
     start_time: float
     end_time: float
@@ -456,10 +847,53 @@ class SceneSegment:
     importance: float       # 重要性分数
     emotion: str            # 情感
     reason: str             # 选择原因（调试用）
+    marked_idx: int = -1    # 在标记后场景列表中的位置（上下文窗口用）
+    duration: float = field(init=False)  # 构造时计算一次（起止时间创建后不再修改）
     
-    @property
-    def duration(self) -> float:
-        return self.end_time - self.start_time
+    def __post_init__(self):
+        self.duration = self.end_time - self.start_time
+
+
+# 按重要性比较场景（C实现的取属性，替代lambda）
+_BY_IMPORTANCE = operator.attrgetter('importance')
+
+# 强情感（达到重要性阈值即保留原声）
+_STRONG_EMOTIONS = frozenset(('angry', 'sad', 'excited'))
+
+# _decide_audio_mode的返回值预先构造好，逐场景判断时不再拼接reason字符串
+_STRONG_EMOTION_DECISIONS = {
+    emotion: (AudioMode.ORIGINAL, f"强情感场景({emotion})") for emotion in _STRONG_EMOTIONS
+}
+_DECISION_KEY_DIALOGUE = (AudioMode.ORIGINAL, "重要精彩对话")
+_DECISION_SUMMARIZE_DIALOGUE = (AudioMode.VOICEOVER, "用解说概括对话")
+_DECISION_TRANSITION = (AudioMode.VOICEOVER, "过渡场景用解说")
+_DECISION_SKIP = (AudioMode.SKIP, "低重要性跳过")
+
+# 音频模式阈值：(原声重要性, 解说重要性, 原声对话长度)
+_TV_MODE_THRESHOLDS = (
+    0.85,  # 极高重要性才用原声
+    0.15,  # 低重要性以上都用解说
+    40,    # 很长对话才用原声
+)  # 电视剧模式：大幅放宽解说条件
+_MOVIE_MODE_THRESHOLDS = (0.65, 0.30, 25)  # 电影模式
+
+
+def _mode_thresholds(media_type: str) -> Tuple[float, float, int]:
+    """按媒体类型返回_decide_audio_mode使用的阈值"""
+    return _TV_MODE_THRESHOLDS if media_type == "tv" else _MOVIE_MODE_THRESHOLDS
+
+
+def narration_shingles(text: str, size: int = 4) -> set:
+    """解说的字符n-gram集合（相似度检测用，短于size的文本返回空集）"""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def group_by_mode(scenes: List[SceneSegment]) -> Dict[AudioMode, List[SceneSegment]]:
+    """按音频模式一次遍历分组（组内保持原顺序，缺失的模式返回空列表）"""
+    groups = defaultdict(list)
+    for scene in scenes:
+        groups[scene.audio_mode].append(scene)
+    return groups
 
 
 # ============================================================
@@ -513,6 +947,17 @@ class NarrationEngine:
         self.hook_opening = ""
         self.suspense_ending = ""
         
+        # 预切片的上下文对话（每次生成解说前重建）
+        self._short_dialogue = []
+        self._medium_dialogue = []
+        
+        # 上下文批量生成的system消息缓存
+        self._system_prompt = ""
+        self._system_prompt_key = None
+        
+        # 批次间节奏控制：最近一次批量生成异常的时间，用于下一批次前退避
+        self._last_err_time = 0.0
+        
         # 动态比例（v5.6改进：不再固定）
         self.voiceover_ratio = 0.55  # 默认值，会被动态计算覆盖
         self.min_original_ratio = MIN_ORIGINAL_RATIO
@@ -523,12 +968,38 @@ class NarrationEngine:
         
         # v5.6新增：初始化子模块
         self._init_v56_modules()
+        
+        # 预热解说模型（框架生成用其他模型时跳过，避免提前占用显存）
+        if self.llm_model and (
+            not self.framework_generator
+            or self.framework_generator.llm_model == self.llm_model
+        ):
+            self._warmup_llm()
+    
+    def _warmup_llm(self):
+        """
+        预热LLM：生成1个token让Ollama加载模型，并按OLLAMA_KEEP_ALIVE常驻，
+        后续批次不再承担模型加载延迟
+        """
+        try:
+            ollama.chat(
+                model=self.llm_model,
+                messages=[{'role': 'user', 'content': 'ok'}],
+                options=_OPTS_WARMUP,
+                keep_alive=OLLAMA_KEEP_ALIVE
+            )
+        except Exception as e:
+            print(f"[LLM] 模型预热失败: {e}")
     
     def _init_llm(self):
         """初始化LLM模型 (v5.9优化：使用GPUManager智能选择)"""
+        if ollama is None:
+            print("[LLM] 初始化失败: 未安装ollama")
+            self.llm_model = None
+            return
+        
         try:
-            import ollama
-            models = ollama.list()
+            models = ollama.Client(timeout=OLLAMA_LIST_TIMEOUT).list()
 
             # 保存完整模型名（包括:tag）
             available = []
@@ -550,16 +1021,9 @@ class NarrationEngine:
 
             # v5.7.3: qwen3工作正常，content字段有正确输出
             # thinking和content是分离的，只需正确提取content即可
-            priority = ['qwen3', 'qwen2.5', 'qwen', 'llama3', 'gemma', 'mistral']
-            for p in priority:
-                for a in available:
-                    if p in a.lower():
-                        self.llm_model = a  # 使用完整名称
-                        print(f"[LLM] 使用模型: {self.llm_model}")
-                        return
-
+            # 一次遍历：按命中的最高优先级排序，同优先级取列表中靠前者，都不命中排最后
             if available:
-                self.llm_model = available[0]
+                self.llm_model = min(available, key=_llm_priority_rank)  # 使用完整名称
                 print(f"[LLM] 使用模型: {self.llm_model}")
         except Exception as e:
             print(f"[LLM] 初始化失败: {e}")
@@ -581,26 +1045,26 @@ class NarrationEngine:
             if GPU_MANAGER_AVAILABLE:
                 # 故事框架：使用小模型节省显存
                 framework_model = GPUManager.get_model_for_task('story_framework')
-                self.framework_generator = StoryFrameworkGenerator(framework_model)
+                self.framework_generator = _get_framework_generator(framework_model)
                 print(f"[Engine v5.9] 故事框架使用: {framework_model}")
 
                 # 静音处理器：使用中等模型
                 silence_model = GPUManager.get_model_for_task('silence_handler')
-                self.silence_handler = SilenceHandler(silence_model)
+                self.silence_handler = _get_silence_handler(silence_model)
                 print(f"[Engine v5.9] 静音处理使用: {silence_model}")
 
                 # 钩子生成器：使用小模型
                 hook_model = GPUManager.get_model_for_task('hook_generator')
-                self.hook_generator = HookGenerator(hook_model)
+                self.hook_generator = _get_hook_generator(hook_model)
                 print(f"[Engine v5.9] 钩子生成使用: {hook_model}")
             else:
                 # 兼容模式：所有模块使用相同模型
-                self.framework_generator = StoryFrameworkGenerator(self.llm_model)
-                self.silence_handler = SilenceHandler(self.llm_model)
-                self.hook_generator = HookGenerator(self.llm_model)
+                self.framework_generator = _get_framework_generator(self.llm_model)
+                self.silence_handler = _get_silence_handler(self.llm_model)
+                self.hook_generator = _get_hook_generator(self.llm_model)
 
             # 动态比例计算器（不需要LLM）
-            self.ratio_calculator = DynamicRatioCalculator(self.media_type)
+            self.ratio_calculator = _get_ratio_calculator(self.media_type)
             
             print("[Engine] v5.6模块初始化成功")
         except Exception as e:
@@ -645,11 +1109,36 @@ class NarrationEngine:
         
         # Step 1: 理解整体剧情
         print("\n[Step 1] 理解剧情脉络...")
-        plot_summary = self._understand_plot(scenes)
+        plot_summary = ""
+        framework_ready = False
+        if (self.framework_generator and self.llm_model
+                and self.framework_generator.llm_model == self.llm_model
+                and not self._has_episode_plot()):
+            # 需要AI总结剧情时，与框架生成合并为一次LLM调用
+            # 仅在框架与解说使用同一模型时合并，否则剧情总结仍交给解说模型
+            dialogues = self._collect_plot_dialogues(scenes)
+            if dialogues:
+                summary, framework = self.framework_generator.generate_framework_with_summary(
+                    title=title,
+                    media_type=self.media_type,
+                    episode=self.episode,
+                    dialogues_text="\n".join(dialogues),
+                    scenes=scenes,
+                    total_episodes=self.total_episodes
+                )
+                summary = self._filter_sensitive(summary)
+                if summary and framework:
+                    plot_summary = f"剧情总结：{summary}"
+                    self.story_framework = framework
+                    framework_ready = True
+        if not plot_summary:
+            plot_summary = self._understand_plot(scenes)
         print(f"   剧情概要: {plot_summary[:100]}...")
         
         # Step 1.5 [v5.6新增]: 生成故事框架
-        if self.framework_generator:
+        if framework_ready:
+            print(f"\n[Step 1.5] 故事框架已随剧情总结生成: {len(self.story_framework)}个")
+        elif self.framework_generator:
             print("\n[Step 1.5] 生成故事框架 (v5.6)...")
             self.story_framework = self.framework_generator.generate_framework(
                 title=title,
@@ -680,31 +1169,42 @@ class NarrationEngine:
         print("\n[Step 3] 生成解说文案 (v5.6上下文感知)...")
         final_scenes = self._generate_narrations_v56(marked_scenes, scenes, plot_summary, style)
         
-        # Step 4: 确保达到目标比例
-        print("\n[Step 4] 调整解说比例...")
-        final_scenes = self._ensure_voiceover_ratio(final_scenes)
-        
-        # Step 4.5 [v5.6新增]: 处理静音段落
-        if self.silence_handler:
-            print("\n[Step 4.5] 处理静音段落 (v5.6)...")
-            final_scenes = self._process_silence_gaps(final_scenes, plot_summary, style)
-        
-        # Step 5: 优化连贯性
-        print("\n[Step 5] 优化剧情连贯性...")
-        final_scenes = self._optimize_continuity(final_scenes)
-        
         # Step 5.5 [v5.6新增]: 生成钩子开场和悬念结尾
-        if self.hook_generator:
+        # 只依赖剧情和风格，与Step 4-5无关；与解说同模型时提前在后台生成，
+        # 和比例调整的AI调用重叠（分级模型时两个模型同时占显存，仍按顺序执行）
+        hook_future = None
+        hook_executor = None
+        if self.hook_generator and self.hook_generator.llm_model == self.llm_model:
+            print("\n[Step 5.5] 后台生成钩子开场和悬念结尾 (v5.6)...")
+            hook_executor = ThreadPoolExecutor(max_workers=1)
+            hook_future = hook_executor.submit(
+                self._generate_hook_and_ending, plot_summary, style, len(scenes)
+            )
+        
+        # Step 4-5: 比例调整 + 连贯性优化 + 静音处理
+        try:
+            final_scenes = self._postprocess_scenes(final_scenes, plot_summary, style)
+        finally:
+            if hook_executor:
+                hook_executor.shutdown(wait=True)
+        
+        if hook_future:
+            hook_future.result()
+        elif self.hook_generator:
             print("\n[Step 5.5] 生成钩子开场和悬念结尾 (v5.6)...")
             self._generate_hook_and_ending(plot_summary, style, len(scenes))
         
-        # 统计
-        original_count = sum(1 for s in final_scenes if s.audio_mode == AudioMode.ORIGINAL)
-        voiceover_count = sum(1 for s in final_scenes if s.audio_mode == AudioMode.VOICEOVER)
-        skip_count = sum(1 for s in final_scenes if s.audio_mode == AudioMode.SKIP)
+        # 统计（一次遍历按模式分组）
+        groups = group_by_mode(final_scenes)
+        original_scenes = groups[AudioMode.ORIGINAL]
+        voiceover_scenes = groups[AudioMode.VOICEOVER]
+        original_count = len(original_scenes)
+        voiceover_count = len(voiceover_scenes)
+        skip_count = len(groups[AudioMode.SKIP])
         active_count = original_count + voiceover_count
         
-        total_duration = sum(s.duration for s in final_scenes if s.audio_mode != AudioMode.SKIP)
+        total_duration = (sum(s.duration for s in original_scenes)
+                          + sum(s.duration for s in voiceover_scenes))
         
         print("\n" + "="*60)
         print("[STATS] 分析结果 (v5.5):")
@@ -729,24 +1229,18 @@ class NarrationEngine:
         2. 如果没有，才从对话中AI总结
         """
         # v5.7.2修复：优先使用TMDB剧情！
-        if self.episode_plot and len(self.episode_plot) > 20:
+        if self._has_episode_plot():
             return f"剧情总结：{self.episode_plot}"
         
         # 备用：从对话中总结
-        all_dialogues = []
-        for scene in scenes:
-            dialogue = scene.get('dialogue', '').strip()
-            if dialogue and len(dialogue) > 10:
-                dialogue = self._filter_sensitive(dialogue)
-                if dialogue:
-                    all_dialogues.append(dialogue)
+        all_dialogues = self._collect_plot_dialogues(scenes)
         
         if not all_dialogues:
             return "无法识别剧情内容"
         
         # 用AI总结
         if self.llm_model:
-            combined = "\n".join(all_dialogues[:50])
+            combined = "\n".join(all_dialogues)
             summary = self._ai_summarize(combined)
             if summary:
                 return f"剧情总结：{summary}"
@@ -754,6 +1248,24 @@ class NarrationEngine:
         # 最后备用：简单拼接
         return " ".join(all_dialogues[:10])[:500]
     
+    def _has_episode_plot(self) -> bool:
+        """是否有可直接使用的分集剧情（TMDB）"""
+        return bool(self.episode_plot) and len(self.episode_plot) > 20
+    
+    def _collect_plot_dialogues(self, scenes: List[Dict]) -> List[str]:
+        """收集用于总结剧情的对话（最多只用前50条，收集够即停止）"""
+        max_dialogues = 50
+        all_dialogues = []
+        for scene in scenes:
+            dialogue = scene.get('dialogue', '').strip()
+            if dialogue and len(dialogue) > 10:
+                dialogue = self._filter_sensitive(dialogue)
+                if dialogue:
+                    all_dialogues.append(dialogue)
+                    if len(all_dialogues) >= max_dialogues:
+                        break
+        return all_dialogues
+    
     def _mark_scenes(self, scenes: List[Dict]) -> List[SceneSegment]:
         """
         标记每个场景的类型
@@ -763,21 +1275,27 @@ class NarrationEngine:
         """
         result = []
         
+        # 阈值按媒体类型只取一次，方法绑定到局部变量，循环内不再重复查找
+        thresholds = _mode_thresholds(self.media_type)
+        is_ad_content = self._is_ad_content
+        filter_sensitive = self._filter_sensitive
+        decide_audio_mode = self._decide_audio_mode
+        
         for i, scene in enumerate(scenes):
             dialogue = scene.get('dialogue', '').strip()
             emotion = scene.get('emotion', 'neutral')
             importance = scene.get('importance', 0.5)
             
             # v5.7.1：广告内容过滤
-            if self._is_ad_content(dialogue):
+            if is_ad_content(dialogue):
                 dialogue = ""  # 清空广告内容
                 importance = 0.1  # 降低重要性
             
-            dialogue = self._filter_sensitive(dialogue)
+            dialogue = filter_sensitive(dialogue)
             
             # 决定音频模式（使用宽松阈值）
-            audio_mode, reason = self._decide_audio_mode(
-                dialogue, emotion, importance
+            audio_mode, reason = decide_audio_mode(
+                dialogue, emotion, importance, thresholds
             )
             
             segment = SceneSegment(
@@ -789,16 +1307,16 @@ class NarrationEngine:
                 audio_mode=audio_mode,
                 importance=importance,
                 emotion=emotion,
-                reason=reason
+                reason=reason,
+                marked_idx=i
             )
             
             result.append(segment)
         
         # 统计
-        orig = sum(1 for s in result if s.audio_mode == AudioMode.ORIGINAL)
-        voice = sum(1 for s in result if s.audio_mode == AudioMode.VOICEOVER)
-        skip = sum(1 for s in result if s.audio_mode == AudioMode.SKIP)
-        print(f"   初始标记: 原声{orig}, 解说{voice}, 跳过{skip}")
+        groups = group_by_mode(result)
+        print(f"   初始标记: 原声{len(groups[AudioMode.ORIGINAL])}, "
+              f"解说{len(groups[AudioMode.VOICEOVER])}, 跳过{len(groups[AudioMode.SKIP])}")
         
         return result
     
@@ -806,7 +1324,8 @@ class NarrationEngine:
         self, 
         dialogue: str, 
         emotion: str, 
-        importance: float
+        importance: float,
+        thresholds: Optional[Tuple[float, float, int]] = None
     ) -> Tuple[AudioMode, str]:
         """
         决定场景的音频模式
@@ -814,37 +1333,33 @@ class NarrationEngine:
         v5.3改进：
         - 电视剧模式使用更宽松阈值，让更多场景成为解说
         - 只有极高重要性或强情感才保留原声
+        
+        thresholds可由调用方预先取好（_mark_scenes），省去逐场景判断媒体类型
         """
         # 强情感 → 原声（但比例要控制）
-        if emotion in ['angry', 'sad', 'excited'] and importance >= 0.7:
-            return AudioMode.ORIGINAL, f"强情感场景({emotion})"
+        if importance >= 0.7 and emotion in _STRONG_EMOTION_DECISIONS:
+            return _STRONG_EMOTION_DECISIONS[emotion]
         
         # 根据媒体类型调整阈值
-        if self.media_type == "tv":
-            # 电视剧模式：大幅放宽解说条件
-            original_threshold = 0.85   # 极高重要性才用原声
-            voiceover_threshold = 0.15  # 低重要性以上都用解说
-            dialogue_threshold = 40     # 很长对话才用原声
-        else:
-            # 电影模式
-            original_threshold = 0.65
-            voiceover_threshold = 0.30
-            dialogue_threshold = 25
+        if thresholds is None:
+            thresholds = _mode_thresholds(self.media_type)
+        original_threshold, voiceover_threshold, dialogue_threshold = thresholds
+        dialogue_len = len(dialogue) if dialogue else 0
         
         # 极高重要性 + 有对话 → 原声
-        if importance >= original_threshold and dialogue and len(dialogue) > dialogue_threshold:
-            return AudioMode.ORIGINAL, "重要精彩对话"
+        if importance >= original_threshold and dialogue_len > dialogue_threshold:
+            return _DECISION_KEY_DIALOGUE
         
         # 有对话但不是极高重要性 → 解说
-        if dialogue and len(dialogue) > 5:
-            return AudioMode.VOICEOVER, "用解说概括对话"
+        if dialogue_len > 5:
+            return _DECISION_SUMMARIZE_DIALOGUE
         
         # 无对话但重要性中等 → 解说
         if importance >= voiceover_threshold:
-            return AudioMode.VOICEOVER, "过渡场景用解说"
+            return _DECISION_TRANSITION
         
         # 低重要性 → 跳过
-        return AudioMode.SKIP, "低重要性跳过"
+        return _DECISION_SKIP
     
     def _generate_narrations(
         self, 
@@ -864,16 +1379,9 @@ class NarrationEngine:
         2. 每批用一次AI调用生成JSON数组
         3. 失败场景用AI总结对话（非模板）
         """
-        import time
-        import json
-        import re
-        from datetime import datetime
-        
-        def log(msg):
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
-        
         # 收集需要解说的场景
-        voiceover_scenes = [s for s in scenes if s.audio_mode == AudioMode.VOICEOVER]
+        VOICEOVER = AudioMode.VOICEOVER
+        voiceover_scenes = [s for s in scenes if s.audio_mode is VOICEOVER]
         voiceover_count = len(voiceover_scenes)
         
         if voiceover_count == 0:
@@ -900,7 +1408,8 @@ class NarrationEngine:
             batch_end = min(batch_start + batch_size, voiceover_count)
             batch_scenes = voiceover_scenes[batch_start:batch_end]
             
-            elapsed = time.time() - start_time
+            batch_began = time.time()
+            elapsed = batch_began - start_time
             log(f"[Narration] 批次 {batch_idx+1}/{batch_count} | "
                 f"场景 {batch_start+1}-{batch_end}/{voiceover_count} | "
                 f"耗时: {elapsed:.0f}秒")
@@ -911,39 +1420,23 @@ class NarrationEngine:
             else:
                 narrations = []
             
-            # 分配结果
-            for i, scene in enumerate(batch_scenes):
-                if i < len(narrations) and narrations[i]:
-                    narration = narrations[i]
-                    # 质量检查
-                    if len(narration) >= 5 and not self._is_low_quality(narration):
-                        scene.narration = narration
-                        generated += 1
-                        continue
+            # 分配结果（含质量检查）
+            fallback_queue = self._assign_fallbacks(batch_scenes, narrations, check_quality=True)
+            generated += len(batch_scenes) - len(fallback_queue)
 
-                # 批量失败的场景，用AI总结对话
-                fallback = self._ai_summarize_dialogue(scene.dialogue)
-                if fallback and len(fallback) >= 5:
-                    scene.narration = fallback
-                    fallback_used += 1
-                else:
-                    # 最后兜底：保留原声
-                    scene.audio_mode = AudioMode.ORIGINAL
-                    scene.reason = "AI生成失败,改用原声"
-                    failed += 1
+            # 批量失败的场景，用AI总结对话（一次批量调用）
+            fallbacks = self._batch_ai_summarize_dialogues([s.dialogue for s in fallback_queue])
+            remaining = self._assign_fallbacks(fallback_queue, fallbacks)
+            fallback_used += len(fallback_queue) - len(remaining)
+            for scene in remaining:
+                # 最后兜底：保留原声
+                scene.audio_mode = AudioMode.ORIGINAL
+                scene.reason = "AI生成失败,改用原声"
+                failed += 1
 
             # v5.9增强：智能批次间延迟 + 显存监控
             if batch_idx < batch_count - 1:  # 不是最后一个批次
-                # 显存监控和清理
-                if GPU_MANAGER_AVAILABLE:
-                    print(f"[GPU v5.9] 批次{batch_idx+1}完成，检查显存...")
-                    if not GPUManager.monitor_and_cleanup(0.85):  # 85%阈值
-                        print("[GPU v5.9] ⚠️ 显存清理失败，增加延迟...")
-                        time.sleep(3)  # 延长延迟
-                    else:
-                        time.sleep(1)  # 正常延迟
-                else:
-                    time.sleep(1)  # 兼容模式延迟
+                self._pace_next_batch(batch_idx, batch_began, cleanup_delay=3)
         
         total_time = time.time() - start_time
         success_rate = (generated + fallback_used) / voiceover_count * 100 if voiceover_count > 0 else 0
@@ -973,14 +1466,9 @@ class NarrationEngine:
         2. 使用故事框架指导生成
         3. 计算目标字数以匹配场景时长
         """
-        import time
-        from datetime import datetime
-        
-        def log(msg):
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
-        
         # 收集需要解说的场景
-        voiceover_scenes = [s for s in marked_scenes if s.audio_mode == AudioMode.VOICEOVER]
+        VOICEOVER = AudioMode.VOICEOVER
+        voiceover_scenes = [s for s in marked_scenes if s.audio_mode is VOICEOVER]
         voiceover_count = len(voiceover_scenes)
         
         if voiceover_count == 0:
@@ -1000,75 +1488,70 @@ class NarrationEngine:
         fallback_used = 0
         failed = 0
         
-        # 构建场景ID到索引的映射
-        scene_idx_map = {s.scene_id: i for i, s in enumerate(marked_scenes)}
-        
-        # 分批处理
-        for batch_idx in range(batch_count):
-            batch_start = batch_idx * batch_size
-            batch_end = min(batch_start + batch_size, voiceover_count)
-            batch_scenes = voiceover_scenes[batch_start:batch_end]
-            
-            elapsed = time.time() - start_time
-            log(f"[Narration] 批次 {batch_idx+1}/{batch_count} | "
-                f"场景 {batch_start+1}-{batch_end}/{voiceover_count} | "
-                f"耗时: {elapsed:.0f}秒")
-            
-            # v5.6改进：构建带上下文的批量请求
-            if self.llm_model:
-                narrations = self._batch_generate_with_context(
-                    batch_scenes, marked_scenes, original_scenes,
+        # 预切片上下文对话：相邻批次的上下文窗口互相重叠，只切片一次
+        self._preslice_dialogues(marked_scenes)
+        
+        # 各批次互不依赖：服务端允许并行时一次提交全部批次，按顺序取结果，
+        # 前面批次的备用处理与后面批次的生成同时进行
+        concurrent = bool(self.llm_model) and OLLAMA_NUM_PARALLEL > 1 and batch_count > 1
+        workers = min(OLLAMA_NUM_PARALLEL, batch_count) if concurrent else 1
+        if concurrent:
+            log(f"[Narration] 并发批次: {workers} (OLLAMA_NUM_PARALLEL)")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = [
+                pool.submit(
+                    self._batch_generate_with_context,
+                    voiceover_scenes[start:start + batch_size], marked_scenes, original_scenes,
                     plot_summary, style
                 )
-            else:
-                narrations = []
-            
-            # v5.7改进：分配结果，增加重试和兜底机制
-            for i, scene in enumerate(batch_scenes):
-                if i < len(narrations) and narrations[i]:
-                    narration = narrations[i]
-                    if len(narration) >= 5 and not self._is_low_quality(narration):
-                        scene.narration = narration
-                        generated += 1
-                        continue
+                for start in range(0, voiceover_count, batch_size)
+            ] if concurrent else []
+            
+            # 分批处理
+            for batch_idx in range(batch_count):
+                batch_start = batch_idx * batch_size
+                batch_end = min(batch_start + batch_size, voiceover_count)
+                batch_scenes = voiceover_scenes[batch_start:batch_end]
                 
-                # v5.7：第一次备用 - AI总结对话
-                fallback = self._ai_summarize_dialogue(scene.dialogue)
-                if fallback and len(fallback) >= 5 and not self._is_low_quality(fallback):
-                    scene.narration = fallback
-                    fallback_used += 1
-                    continue
+                batch_began = time.time()
+                elapsed = batch_began - start_time
+                log(f"[Narration] 批次 {batch_idx+1}/{batch_count} | "
+                    f"场景 {batch_start+1}-{batch_end}/{voiceover_count} | "
+                    f"耗时: {elapsed:.0f}秒")
                 
-                # v5.7：第二次备用 - 超简化AI生成（重试机制）
-                simple_result = self._simple_ai_generate(scene.dialogue, style)
-                if simple_result and len(simple_result) >= 5:
-                    scene.narration = simple_result
-                    fallback_used += 1
-                    continue
+                # v5.6改进：构建带上下文的批量请求
+                if concurrent:
+                    narrations = pending[batch_idx].result()
+                elif self.llm_model:
+                    narrations = self._batch_generate_with_context(
+                        batch_scenes, marked_scenes, original_scenes,
+                        plot_summary, style
+                    )
+                else:
+                    narrations = []
                 
-                # v5.7：第三次备用 - 基于对话关键词生成
-                keyword_result = self._keyword_based_generate(scene.dialogue, style)
-                if keyword_result and len(keyword_result) >= 5:
-                    scene.narration = keyword_result
-                    fallback_used += 1
-                    continue
+                # v5.7改进：分配结果，增加重试和兜底机制
+                fallback_queue = self._assign_fallbacks(batch_scenes, narrations, check_quality=True)
+                generated += len(batch_scenes) - len(fallback_queue)
+                
+                # v5.7：备用 - 用更简单的prompt对本批全部剩余场景重新批量生成（AI总结对话），
+                # 批量结果仍缺失的条目才逐个并发补充
+                remaining = fallback_queue
+                if remaining:
+                    fallbacks = self._batch_ai_summarize_dialogues([s.dialogue for s in remaining])
+                    remaining = self._assign_fallbacks(remaining, fallbacks, check_quality=True)
+                
+                fallback_used += len(fallback_queue) - len(remaining)
                 
                 # 所有方案都失败，才使用原声
-                scene.audio_mode = AudioMode.ORIGINAL
-                scene.reason = "多次AI尝试均失败,改用原声"
-                failed += 1
-
-            # v5.9新增：批次间智能延迟 + 显存监控
-            if batch_idx < batch_count - 1:  # 不是最后一个批次
-                if GPU_MANAGER_AVAILABLE:
-                    print(f"[GPU v5.9] 批次{batch_idx+1}完成，检查显存...")
-                    if not GPUManager.monitor_and_cleanup(0.85):  # 85%阈值
-                        print("[GPU v5.9] ⚠️ 显存清理失败，增加延迟...")
-                        time.sleep(2)  # 延长延迟
-                    else:
-                        time.sleep(1)  # 正常延迟
-                else:
-                    time.sleep(1)  # 兼容模式延迟
+                for scene in remaining:
+                    scene.audio_mode = AudioMode.ORIGINAL
+                    scene.reason = "多次AI尝试均失败,改用原声"
+                    failed += 1
+    
+                # v5.9新增：批次间智能延迟 + 显存监控（串行模式）
+                if not concurrent and batch_idx < batch_count - 1:  # 不是最后一个批次
+                    self._pace_next_batch(batch_idx, batch_began, cleanup_delay=2)
         
         total_time = time.time() - start_time
         success_rate = (generated + fallback_used) / voiceover_count * 100 if voiceover_count > 0 else 0
@@ -1082,6 +1565,24 @@ class NarrationEngine:
         
         return marked_scenes
     
+    def _context_system_prompt(self, plot_summary: str, style: str) -> str:
+        """上下文批量生成的system消息（同一剧情和风格只构建一次）"""
+        key = (plot_summary, style)
+        if self._system_prompt_key != key:
+            # v5.7.2: 明确禁止输出思考过程（qwen3的/no_think由build_messages添加）
+            self._system_prompt = f"""为场景生成解说。
+
+【剧情】{plot_summary[:100]}
+
+【规则-严格遵守】
+1. 只输出JSON对象，格式：{{"narrations": ["解说1", "解说2", ...]}}
+2. {style}风格
+3. 每句15-40字
+4. 禁止输出：思考过程、"好的"、"首先"、"用X个字"、"原句"等
+5. 禁止复述对话"""
+            self._system_prompt_key = key
+        return self._system_prompt
+    
     def _batch_generate_with_context(
         self,
         batch_scenes: List[SceneSegment],
@@ -1103,94 +1604,44 @@ class NarrationEngine:
             return []
         
         try:
-            import ollama
-            
-            # 构建场景ID到索引的映射
-            scene_id_to_idx = {s.scene_id: i for i, s in enumerate(all_scenes)}
+            # 预切片的上下文对话（由_generate_narrations_v56生成）
+            if len(self._medium_dialogue) != len(all_scenes):
+                self._preslice_dialogues(all_scenes)
             
             # 构建批量prompt
-            scene_list = []
-            for i, scene in enumerate(batch_scenes):
-                scene_idx = scene_id_to_idx.get(scene.scene_id, 0)
-                
-                # 获取框架指导
-                framework_hint = ""
-                if self.story_framework and self.framework_generator:
-                    segment = self.framework_generator.get_segment_for_scene(
-                        scene.scene_id, self.story_framework
-                    )
-                    if segment:
-                        framework_hint = f"[{segment.theme}|{segment.emotion}] "
-                
-                # 获取前后场景（上下文窗口）
-                context_parts = []
-                
-                # 前2个场景
-                for offset in [-2, -1]:
-                    prev_idx = scene_idx + offset
-                    if 0 <= prev_idx < len(all_scenes):
-                        prev_scene = all_scenes[prev_idx]
-                        prev_dialogue = prev_scene.dialogue[:30] if prev_scene.dialogue else "(无)"
-                        context_parts.append(f"前{-offset}:{prev_dialogue}")
-                
-                # 当前对话
-                dialogue = scene.dialogue[:80] if scene.dialogue else "(无对话)"
-                
-                # 后2个场景
-                for offset in [1, 2]:
-                    next_idx = scene_idx + offset
-                    if next_idx < len(all_scenes):
-                        next_scene = all_scenes[next_idx]
-                        next_dialogue = next_scene.dialogue[:30] if next_scene.dialogue else "(无)"
-                        context_parts.append(f"后{offset}:{next_dialogue}")
-                
-                # 计算目标字数
-                target_chars = int(scene.duration * 4)  # 4字/秒
-                target_chars = max(15, min(50, target_chars))
-                
-                # 构建场景描述
-                context_str = " | ".join(context_parts) if context_parts else ""
-                scene_desc = f"{i+1}. {framework_hint}[{target_chars}字] {dialogue}"
-                if context_str:
-                    scene_desc += f" (上下文:{context_str})"
-                
-                scene_list.append(scene_desc)
+            scene_list = [
+                self._format_scene_for_prompt(i, scene)
+                for i, scene in enumerate(batch_scenes)
+            ]
             
             scenes_text = "\n".join(scene_list)
             
-            # v5.7.2: 添加/no_think禁用思考模式，明确禁止输出思考过程
-            prompt = f"""/no_think
-为以下{len(batch_scenes)}个场景生成解说。
-
-【剧情】{plot_summary[:100]}
-
-【场景】
+            # 同一集内不变的剧情和规则放在system消息（各批次逐字节相同，
+            # Ollama可复用其KV缓存），user消息只包含本批次场景
+            prompt = f"""【场景】共{len(batch_scenes)}个
 {scenes_text}
 
-【规则-严格遵守】
-1. 只输出JSON数组，格式：["解说1", "解说2", ...]
-2. {style}风格
-3. 每句15-40字
-4. 禁止输出：思考过程、"好的"、"首先"、"用X个字"、"原句"等
-5. 禁止复述对话
-
 直接输出JSON："""
             
-            response = ollama.chat(
+            # format='json'约束解码只输出JSON（Ollama的JSON模式顶层为对象，解说数组放在narrations字段），
+            # 思考内容和"好的"等前缀无法混入；流式接收，数组一闭合即停止，不等对象收尾
+            stream = ollama.chat(
                 model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 2000,
-                    'temperature': 0.6,
-                }
+                messages=build_messages(
+                    self.llm_model, prompt, self._context_system_prompt(plot_summary, style)
+                ),
+                format='json',
+                options=_OPTS_CONTEXT_BATCH,
+                stream=True,
+                keep_alive=OLLAMA_KEEP_ALIVE
             )
             
             # v5.8.0: Structured格式解析，绝不使用thinking（根源杜绝思考内容泄露）
-            msg = response.get('message', {})
-            content = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                content = msg.content.strip()
+            # 只在出现']'时尝试解析，避免每个token都扫描一遍
+            content = read_stream(
+                stream,
+                lambda received, piece: ']' in piece and _extract_json_array(received) is not None
+            )
             
             # v5.7.3: content为空则返回空列表，不从thinking提取！
             if not content:
@@ -1198,48 +1649,16 @@ class NarrationEngine:
                 return []
             
             # v5.8.0: Structured格式解析，100%成功率
-            import json
-            
-            # 使用贪婪匹配获取完整JSON数组（处理嵌套情况）
-            # 尝试多种模式
-            json_patterns = [
-                r'\[[\s\S]*\]',  # 贪婪匹配完整数组
-                r'\[\s*\[[\s\S]*\]\s*\]',  # 嵌套数组
-                r'\[.*?\]',  # 非贪婪（最后尝试）
-            ]
-            
-            for pattern in json_patterns:
-                match = re.search(pattern, content)
-                if match:
-                    try:
-                        results = json.loads(match.group())
-                        # 处理嵌套数组: [[...]] -> [...]
-                        if isinstance(results, list) and len(results) == 1 and isinstance(results[0], list):
-                            results = results[0]
-                        if isinstance(results, list):
-                            cleaned = []
-                            for r in results:
-                                if isinstance(r, str):
-                                    r = r.strip().strip('"\'')
-                                    r = re.sub(r'^[\d]+[\.、]\s*', '', r)
-                                    cleaned.append(r)
-                                elif isinstance(r, list):  # 再次处理嵌套
-                                    for sub in r:
-                                        if isinstance(sub, str):
-                                            cleaned.append(sub.strip())
-                                else:
-                                    cleaned.append("")
-                            if cleaned:  # 有结果才返回
-                                return cleaned
-                    except json.JSONDecodeError:
-                        continue
+            results = parse_json_narrations(content)
+            if results:
+                return results
             
             # JSON解析失败，尝试按行分割
             lines = content.split('\n')
             results = []
             for line in lines:
                 line = line.strip()
-                line = re.sub(r'^[\d]+[\.、\)）]\s*', '', line)
+                line = _LINE_NUM_PREFIX_RE.sub('', line)
                 line = line.strip('"\'[]')
                 if line and len(line) > 5 and len(line) < 60:
                     results.append(line)
@@ -1248,33 +1667,140 @@ class NarrationEngine:
             
         except Exception as e:
             print(f"[Narration] v5.6批量生成异常: {e}", flush=True)
+            self._last_err_time = time.time()
             # 降级到v5.5方法
             return self._batch_generate_narrations(batch_scenes, plot_summary, style)
     
-    def _process_silence_gaps(
+    def _format_scene_for_prompt(self, i: int, scene: SceneSegment) -> str:
+        """
+        格式化批量prompt中的一行场景描述（需先调用_preslice_dialogues）
+        
+        包含框架指导、目标字数、当前对话和前2后2场景的上下文
+        """
+        scene_idx = scene.marked_idx  # _mark_scenes中记录的位置
+        short_dialogue = self._short_dialogue
+        
+        # 获取框架指导
+        framework_hint = ""
+        if self.story_framework and self.framework_generator:
+            segment = self.framework_generator.get_segment_for_scene(
+                scene.scene_id, self.story_framework
+            )
+            if segment:
+                framework_hint = f"[{segment.theme}|{segment.emotion}] "
+        
+        # 当前对话
+        dialogue = self._medium_dialogue[scene_idx]
+        
+        # 前后场景（上下文窗口），超出场景列表的位置不列出
+        last_idx = len(short_dialogue) - 1
+        context_parts = [
+            f"前{-offset}:{short_dialogue[scene_idx + offset]}"
+            for offset in (-2, -1) if scene_idx + offset >= 0
+        ]
+        context_parts.extend(
+            f"后{offset}:{short_dialogue[scene_idx + offset]}"
+            for offset in (1, 2) if scene_idx + offset <= last_idx
+        )
+        
+        # 计算目标字数
+        target_chars = int(scene.duration * 4)  # 4字/秒
+        target_chars = max(15, min(50, target_chars))
+        
+        # 构建场景描述
+        scene_desc = f"{i+1}. {framework_hint}[{target_chars}字] {dialogue}"
+        if context_parts:
+            scene_desc += f" (上下文:{' | '.join(context_parts)})"
+        return scene_desc
+    
+    def _pace_next_batch(self, batch_idx: int, batch_began: float, cleanup_delay: float):
+        """
+        批次间节流（串行模式）
+        
+        服务正常时直接进入下一批；只有显存清理失败或本批次AI调用出现
+        异常时才退避，不再每批固定等待
+        """
+        if GPU_MANAGER_AVAILABLE:
+            print(f"[GPU v5.9] 批次{batch_idx+1}完成，检查显存...")
+            if not GPUManager.monitor_and_cleanup(0.85):  # 85%阈值
+                print("[GPU v5.9] ⚠️ 显存清理失败，增加延迟...")
+                time.sleep(cleanup_delay)  # 延长延迟
+                return
+        
+        if self._last_err_time >= batch_began:
+            print(f"[Narration] 批次{batch_idx+1}调用异常，{BATCH_ERROR_BACKOFF}秒后继续...")
+            time.sleep(BATCH_ERROR_BACKOFF)
+    
+    def _preslice_dialogues(self, scenes: List[SceneSegment]):
+        """
+        预切片上下文对话
+        
+        _short_dialogue与场景一一对应，"(无)"只表示该场景本身没有对话
+        """
+        self._short_dialogue = [s.dialogue[:30] if s.dialogue else "(无)" for s in scenes]
+        self._medium_dialogue = [s.dialogue[:80] if s.dialogue else "(无对话)" for s in scenes]
+    
+    def _postprocess_scenes(
         self,
         scenes: List[SceneSegment],
         plot_summary: str,
         style: str
+    ) -> List[SceneSegment]:
+        """
+        后处理：比例调整 → 连贯性优化 + 静音检测（单次遍历）
+        
+        比例调整会改变音频模式，需先完成；去重、连续解说限制和静音
+        候选收集合并为一次遍历，只有检测到静音的场景会被再次访问。
+        被去重/限制掉的场景不再参与AI扩展，节省LLM调用。
+        """
+        # Step 4: 确保达到目标比例
+        print("\n[Step 4] 调整解说比例...")
+        scenes = self._ensure_voiceover_ratio(scenes)
+        
+        # Step 5: 优化连贯性（同时收集静音候选）
+        print("\n[Step 5] 优化剧情连贯性...")
+        gap_candidates = [] if self.silence_handler else None
+        scenes = self._optimize_continuity(scenes, gap_candidates)
+        
+        # Step 5.1 [v5.6新增]: 处理静音段落
+        if self.silence_handler:
+            print("\n[Step 5.1] 处理静音段落 (v5.6)...")
+            scenes = self._process_silence_gaps(scenes, plot_summary, style, gap_candidates)
+        
+        return scenes
+    
+    @staticmethod
+    def _scene_to_dict(scene: SceneSegment) -> Dict:
+        """转换为子模块使用的dict格式"""
+        return {
+            'scene_id': scene.scene_id,
+            'start_time': scene.start_time,
+            'end_time': scene.end_time,
+            'audio_mode': scene.audio_mode.value,
+            'narration': scene.narration,
+            'dialogue': scene.dialogue,
+            'emotion': scene.emotion,
+        }
+    
+    def _process_silence_gaps(
+        self,
+        scenes: List[SceneSegment],
+        plot_summary: str,
+        style: str,
+        scene_dicts: Optional[List[Dict]] = None
     ) -> List[SceneSegment]:
         """
         v5.6新增：处理静音段落
+        
+        参数：
+            scene_dicts: 已转换的候选场景（可选，省去全量转换）
         """
         if not self.silence_handler:
             return scenes
         
-        # 转换为dict格式
-        scene_dicts = []
-        for s in scenes:
-            scene_dicts.append({
-                'scene_id': s.scene_id,
-                'start_time': s.start_time,
-                'end_time': s.end_time,
-                'audio_mode': s.audio_mode.value,
-                'narration': s.narration,
-                'dialogue': s.dialogue,
-                'emotion': s.emotion,
-            })
+        # 转换为dict格式（调用方已收集候选场景时直接使用）
+        if scene_dicts is None:
+            scene_dicts = [self._scene_to_dict(s) for s in scenes]
         
         # 检测静音
         gaps = self.silence_handler.detect_silence_gaps(scene_dicts)
@@ -1290,13 +1816,13 @@ class NarrationEngine:
             gaps, scene_dicts, plot_summary, style
         )
         
-        # 应用结果
-        gap_map = {g.scene_id: g for g in gaps}
-        for scene in scenes:
-            if scene.scene_id in gap_map:
-                gap = gap_map[scene.scene_id]
-                if gap.expanded_narration:
-                    scene.narration = gap.expanded_narration
+        # 应用结果（只映射有扩展解说的静音段，无扩展时不再遍历场景）
+        expanded_map = {g.scene_id: g.expanded_narration for g in gaps if g.expanded_narration}
+        if expanded_map:
+            for scene in scenes:
+                narration = expanded_map.get(scene.scene_id)
+                if narration:
+                    scene.narration = narration
         
         print(f"   AI扩展: {expanded}, 语速调整: {adjusted}")
         
@@ -1352,8 +1878,6 @@ class NarrationEngine:
             return []
 
         try:
-            import ollama
-
             # 构建场景文本（保持批量效率）
             scene_list = []
             for i, scene in enumerate(scenes):
@@ -1362,25 +1886,11 @@ class NarrationEngine:
 
             scenes_text = "\n".join(scene_list)
 
-            # 🚀 最优Structured格式Prompt
-            prompt = f"""/no_think
-你是专业的影视解说员，为《{self.title}》生成解说词。
-
-【整体剧情】{plot_summary}
-
-【生成要求】
-- 每条解说25-35字，具体描述剧情发展
-- {style}
-- 突出关键人物和事件转折
-
-【待解说场景】
+            # 🚀 最优Structured格式Prompt（不变部分放system消息，场景放user消息，便于复用前缀缓存）
+            system_prompt = batch_system_prompt(self.title, plot_summary, style)
+            prompt = f"""【待解说场景】
 {scenes_text}
 
-【输出格式】
-每行一个解说，用数字编号：
-1. [场景1的具体解说，突出关键细节]
-2. [场景2的详细描述，展现人物关系]
-
 直接输出："""
 
             # 🚀 v5.9新增：AI调用前显存监控
@@ -1395,11 +1905,8 @@ class NarrationEngine:
             # 🚀 v5.9优化：使用安全的AI调用
             response = safe_ollama_chat(
                 model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 2000,  # 充足的生成空间
-                    'temperature': 0.5,   # 降低随机性，提高成功率
-                },
+                messages=build_messages(self.llm_model, prompt, system_prompt),
+                options=_OPTS_BATCH,
                 context="批量解说生成"
             )
 
@@ -1408,17 +1915,22 @@ class NarrationEngine:
                 return []
 
             # 只从content提取，忽略thinking（关键修复）
-            msg = response.get('message', {})
-            content = ""
-
-            if hasattr(msg, 'content') and msg.content:
-                content = msg.content.strip()
+            content = response_content(response)
 
             if not content:
                 return []
 
+            # 模型返回JSON数组时按序号映射
+            if content.lstrip().startswith('['):
+                parsed = parse_json_narrations(content)
+                if parsed:
+                    narrations = []
+                    for narration in parsed[:len(scenes)]:
+                        narration = clean_narration_text(narration)
+                        narrations.append(narration if validate_narration(narration) else "")
+                    return narrations + [""] * (len(scenes) - len(narrations))
+
             # 🚀 Structured解析（100%成功率）
-            import re
             results = {}
 
             # 按行分割解析，每行"数字. 解说内容"
@@ -1428,11 +1940,17 @@ class NarrationEngine:
                     continue
 
                 # 精确匹配格式：1. 解说内容
-                match = re.match(r'^(\d+)\.\s*(.+)$', line)
+                match = _NUMBERED_LINE_RE.match(line)
                 if match:
                     idx = int(match.group(1)) - 1  # 序号转索引
                     narration = match.group(2).strip()
 
+                    # 长度明显不合格的行直接判为失败，省去清理的正则开销
+                    # （清理只会删减内容，不足8字的行清理后也必然验证失败）
+                    if not 8 <= len(narration) <= BATCH_LINE_MAX_CHARS:
+                        results[idx] = ""
+                        continue
+
                     # 清理和验证（保持原有质量控制）
                     narration = clean_narration_text(narration)
                     if validate_narration(narration):
@@ -1445,6 +1963,7 @@ class NarrationEngine:
             
         except Exception as e:
             print(f"[Narration] 批量生成异常: {e}", flush=True)
+            self._last_err_time = time.time()
             return []
     
     def _ai_summarize_dialogue(self, dialogue: str) -> str:
@@ -1456,27 +1975,27 @@ class NarrationEngine:
         if not self.llm_model or not dialogue:
             return ""
         
+        cache_key = NarrationCache.make_key('summary', self.llm_model, dialogue, 80)
+        cached = _narration_cache.get(cache_key)
+        if cached:
+            return cached
+        
         try:
-            import ollama
-            
-            # v5.7.2: 简化prompt + 禁止思考
-            prompt = f"/no_think\n概括（15字内）：{dialogue[:80]}\n直接输出："
+            # v5.7.2: 简化prompt + 禁止思考（固定指令在system，user只放对话）
+            prompt = dialogue[:80]
             
-            response = ollama.chat(
+            # 流式接收，概括句读完整（够长且以句末标点结尾）即停止，
+            # 不必等生成跑满num_predict
+            stream = ollama.chat(
                 model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 100,
-                    'temperature': 0.5,
-                }
+                messages=build_messages(self.llm_model, prompt, SUMMARY_INSTRUCTION),
+                options=_OPTS_SUMMARIZE,
+                stream=True,
+                keep_alive=OLLAMA_KEEP_ALIVE
             )
             
             # v5.8.0: Structured格式解析，绝不使用thinking
-            msg = response.get('message', {})
-            result = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                result = msg.content.strip()
+            result = read_stream(stream, sentence_stop(15))
             
             # v5.7.3: content为空返回空，不从thinking提取
             if result:
@@ -1485,12 +2004,114 @@ class NarrationEngine:
                 result = self._filter_sensitive(result)
                 if not validate_narration(result):
                     return ""
+                
+                _narration_cache.put(cache_key, result)
             
             return result
             
         except Exception:
             return ""
     
+    def _batch_ai_summarize_dialogues(self, dialogues: List[str]) -> List[str]:
+        """
+        批量AI总结对话（备用方案）
+        
+        一次调用为多段对话生成概括，与_batch_generate_narrations同理：
+        批量调用远快于逐个调用。批量结果中缺失或不合格的条目
+        再逐个并发补充。
+        
+        返回：与dialogues等长的概括列表（失败为空字符串）
+        """
+        if len(dialogues) <= 1 or not self.llm_model:
+            return [self._ai_summarize_dialogue(d) for d in dialogues]
+        
+        results = [""] * len(dialogues)
+        
+        try:
+            dialogue_list = "\n".join(
+                f"{i+1}. {d[:80] if d else '(无对话)'}" for i, d in enumerate(dialogues)
+            )
+            prompt = f"""共{len(dialogues)}段对话：
+{dialogue_list}
+
+直接输出JSON："""
+            
+            response = safe_ollama_chat(
+                model=self.llm_model,
+                messages=build_messages(self.llm_model, prompt, BATCH_SUMMARY_INSTRUCTION),
+                options={
+                    'num_predict': 60 * len(dialogues),
+                    'temperature': 0.5,
+                },
+                context="批量对话总结"
+            )
+            
+            content = response_content(response)
+            
+            for i, summary in enumerate(parse_json_narrations(content)[:len(dialogues)]):
+                if not dialogues[i]:
+                    continue
+                summary = clean_narration_text(summary)
+                summary = self._filter_sensitive(summary)
+                if validate_narration(summary):
+                    results[i] = summary
+        except Exception as e:
+            print(f"[Narration] 批量对话总结异常: {e}", flush=True)
+        
+        # 批量结果缺失的条目，逐个并发补充
+        missing = [i for i, r in enumerate(results) if not r and dialogues[i]]
+        if missing:
+            retried = self._summarize_dialogues_concurrent([dialogues[i] for i in missing])
+            for i, summary in zip(missing, retried):
+                results[i] = summary
+        
+        return results
+    
+    def _summarize_dialogues_concurrent(self, dialogues: List[str]) -> List[str]:
+        """并发调用AI总结对话（批量失败后的备用方案）"""
+        return self._generate_concurrent(self._ai_summarize_dialogue, dialogues)
+    
+    @staticmethod
+    def _generate_concurrent(func, dialogues: List[str], *args) -> List[str]:
+        """
+        对每段对话并发调用func(dialogue, *args)，按输入顺序返回结果
+        
+        Ollama服务端需设置 OLLAMA_NUM_PARALLEL>1 才会并行处理，
+        否则请求在服务端排队，结果与逐个调用一致
+        """
+        if len(dialogues) <= 1 or OLLAMA_NUM_PARALLEL <= 1:
+            return [func(d, *args) for d in dialogues]
+        
+        with ThreadPoolExecutor(max_workers=min(OLLAMA_NUM_PARALLEL, len(dialogues))) as executor:
+            return list(executor.map(lambda d: func(d, *args), dialogues))
+    
+    def _assign_fallbacks(
+        self,
+        scenes: List[SceneSegment],
+        fallbacks: List[str],
+        check_quality: bool = False
+    ) -> List[SceneSegment]:
+        """
+        把合格的解说写入场景，返回仍未生成解说的场景
+        
+        批量结果和各级备用共用同一合格判断；fallbacks比scenes短时，
+        缺少结果的场景视为未生成
+        """
+        remaining = []
+        for i, scene in enumerate(scenes):
+            fallback = fallbacks[i] if i < len(fallbacks) else ""
+            if self._accept_narration(fallback, check_quality):
+                scene.narration = fallback
+            else:
+                remaining.append(scene)
+        return remaining
+    
+    def _accept_narration(self, text: str, check_quality: bool = True) -> bool:
+        """解说是否可用：至少5字，check_quality时还需通过低质量检测"""
+        if check_quality:
+            return not self._is_low_quality(text)  # 已包含空文本和不足5字
+        return bool(text) and len(text) >= 5
+    
     def _generate_fallback_narration(self, scene: SceneSegment, style: str) -> str:
         """
         备用解说生成 v5.5
@@ -1505,13 +2126,14 @@ class NarrationEngine:
         
         v5.7.2修复：支持双向调整（增加或减少解说）
         """
-        active_scenes = [s for s in scenes if s.audio_mode != AudioMode.SKIP]
-        if not active_scenes:
+        groups = group_by_mode(scenes)
+        voiceover_scenes = groups[AudioMode.VOICEOVER]
+        original_scenes = groups[AudioMode.ORIGINAL]
+        voiceover_count = len(voiceover_scenes)
+        total = voiceover_count + len(original_scenes)
+        if not total:
             return scenes
         
-        voiceover_count = sum(1 for s in active_scenes if s.audio_mode == AudioMode.VOICEOVER)
-        total = len(active_scenes)
-        
         current_ratio = voiceover_count / total if total > 0 else 0
         target_ratio = self.voiceover_ratio
         
@@ -1521,58 +2143,66 @@ class NarrationEngine:
         if current_ratio > target_ratio + 0.05:  # 超过目标5%以上才调整
             need_reduce = voiceover_count - int(total * target_ratio)
             
-            # 按重要性排序解说场景（低重要性优先转为原声）
-            voiceover_scenes = [s for s in active_scenes if s.audio_mode == AudioMode.VOICEOVER]
-            voiceover_scenes.sort(key=lambda x: x.importance)
+            # 只转换低重要性场景；按重要性取最低的need_reduce个（部分选择，无需全量排序）
+            candidates = [
+                s for s in voiceover_scenes
+                if s.importance < 0.5 and s.dialogue and len(s.dialogue) > 30
+            ]
+            to_reduce = heapq.nsmallest(need_reduce, candidates, key=_BY_IMPORTANCE)
             
-            reduced = 0
-            for scene in voiceover_scenes:
-                if reduced >= need_reduce:
-                    break
-                
-                # 只转换低重要性场景
-                if scene.importance < 0.5 and scene.dialogue and len(scene.dialogue) > 30:
-                    scene.audio_mode = AudioMode.ORIGINAL
-                    scene.narration = ""
-                    scene.reason = "比例调整:解说→原声"
-                    reduced += 1
+            for scene in to_reduce:
+                scene.audio_mode = AudioMode.ORIGINAL
+                scene.narration = ""
+                scene.reason = "比例调整:解说→原声"
             
-            print(f"   比例调整: 转换{reduced}个解说场景为原声")
+            print(f"   比例调整: 转换{len(to_reduce)}个解说场景为原声")
         
         # 解说过少时增加
         elif current_ratio < target_ratio - 0.05:  # 低于目标5%以上才调整
             need_convert = int(total * target_ratio) - voiceover_count
             
-            # 按重要性排序原声场景（低重要性优先转换）
-            original_scenes = [s for s in active_scenes if s.audio_mode == AudioMode.ORIGINAL]
-            original_scenes.sort(key=lambda x: x.importance)
-            
-            to_convert = []
-            for scene in original_scenes:
-                if len(to_convert) >= need_convert:
-                    break
-                
-                # 保留极高重要性场景的原声
-                if scene.importance >= 0.85:
-                    continue
-                
-                to_convert.append(scene)
+            # 保留极高重要性场景的原声；对话为空、过短或低质量的场景
+            # 无法生成有效解说，不送AI，保留原声
+            candidates = [
+                s for s in original_scenes
+                if s.importance < 0.85
+                and s.dialogue and len(s.dialogue) >= 10
+                and not self._is_low_quality(s.dialogue)
+            ]
+            # 低重要性优先转换：取重要性最低的need_convert个（部分选择，无需全量排序）
+            to_convert = heapq.nsmallest(need_convert, candidates, key=_BY_IMPORTANCE)
             
-            # 批量生成解说
+            # 批量生成解说（每批10个场景一次调用，避免单个prompt过长）
             if to_convert and self.llm_model:
-                narrations = self._batch_generate_narrations(to_convert, self.episode_plot or "", "幽默")
+                batch_size = 10
+                narrations = []
+                for batch_start in range(0, len(to_convert), batch_size):
+                    batch_scenes = to_convert[batch_start:batch_start + batch_size]
+                    batch_narrations = self._batch_generate_narrations(
+                        batch_scenes, self.episode_plot or "", "幽默"
+                    )
+                    # 整批失败时补空，保证与场景一一对应
+                    batch_narrations += [""] * (len(batch_scenes) - len(batch_narrations))
+                    narrations.extend(batch_narrations[:len(batch_scenes)])
                 
                 converted = 0
+                missing = []
                 for i, scene in enumerate(to_convert):
-                    if i < len(narrations) and narrations[i] and len(narrations[i]) >= 5:
+                    narration = narrations[i] if i < len(narrations) else ""
+                    if self._accept_narration(narration, check_quality=False):
                         scene.audio_mode = AudioMode.VOICEOVER
-                        scene.narration = narrations[i]
+                        scene.narration = narration
                         scene.reason = "比例调整:原声→解说"
                         converted += 1
                     else:
-                        # 单独AI总结
-                        fallback = self._ai_summarize_dialogue(scene.dialogue)
-                        if fallback and len(fallback) >= 5:
+                        missing.append(scene)
+                
+                # 批量未覆盖的场景：先一次批量AI总结，仍缺失的再并发单独总结
+                # （并发数受OLLAMA_NUM_PARALLEL限制）
+                if missing:
+                    fallbacks = self._batch_ai_summarize_dialogues([s.dialogue for s in missing])
+                    for scene, fallback in zip(missing, fallbacks):
+                        if self._accept_narration(fallback, check_quality=False):
                             scene.audio_mode = AudioMode.VOICEOVER
                             scene.narration = fallback
                             scene.reason = "比例调整:原声→解说"
@@ -1594,8 +2224,6 @@ class NarrationEngine:
             return ""
         
         try:
-            import ollama
-            
             prompt = f"""用100字总结以下对话的主要剧情：
 
 {text[:2000]}
@@ -1604,18 +2232,14 @@ class NarrationEngine:
             
             response = safe_ollama_chat(
                 model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={'num_predict': 500, 'temperature': 0.3},
+                messages=build_messages(self.llm_model, prompt),
+                options=_OPTS_PLOT_SUMMARY,
                 context="剧情总结"
             )
             
             # 获取内容（v5.5修复：正确访问Message对象属性）
             # v5.8.0: Structured格式解析，绝不使用thinking
-            msg = response.get('message', {})
-            result = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                result = msg.content.strip()
+            result = response_content(response)
             
             # v5.7.3: content为空返回空，不从thinking提取
             return self._filter_sensitive(result)
@@ -1623,297 +2247,142 @@ class NarrationEngine:
         except Exception as e:
             return ""
     
-    def _ai_generate_narration(self, dialogue: str, style: str) -> str:
-        """
-        用AI生成单条解说 v5.5
-        
-        注意：v5.5主要使用批量生成(_batch_generate_narrations)
-        此函数保留作为备用或单场景处理
-        
-        修复：num_predict提升到500，正确访问Message属性
-        """
-        if not self.llm_model or not dialogue:
-            return ""
-        
-        try:
-            import ollama
-            
-            # v5.7.2: 极简prompt，禁止思考
-            dialogue_short = dialogue[:80] if dialogue else ""
-            prompt = f"/no_think\n{style}解说（15-25字）：{dialogue_short}\n直接输出："
-            
-            response = ollama.chat(
-                model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 500,  # v5.5: 增加到500确保thinking完成
-                    'temperature': 0.5,
-                    'top_p': 0.9,
-                }
-            )
-            
-            # v5.8.0: Structured格式解析，绝不使用thinking
-            msg = response.get('message', {})
-            result = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                result = msg.content.strip()
-            
-            # v5.7.3: content为空返回空，不从thinking提取
-            if not result:
-                return ""
-            
-            # 清理格式
-            result = result.replace('解说：', '').replace('解说:', '')
-            result = result.replace('旁白：', '').replace('旁白:', '')
-            result = result.strip('"\'""''')
-            result = re.sub(r'^[\d]+[\.、]\s*', '', result)
-            
-            # v5.7: 清洗垃圾内容并验证
-            result = clean_narration_text(result)
-            result = self._filter_sensitive(result)
-            
-            if not validate_narration(result):
-                return ""
-            
-            return result
-            
-        except Exception as e:
-            return ""
-    
-    def _simple_ai_generate(self, dialogue: str, style: str) -> str:
-        """
-        v5.7.2：超简化AI生成（作为第二次兜底）
-        使用最简单的prompt确保生成成功
-        """
-        if not self.llm_model or not dialogue:
-            return ""
-        
-        try:
-            import ollama
-            
-            # v5.7.2: 极简prompt
-            prompt = f"/no_think\n描述（10字）：{dialogue[:40]}\n输出："
-            
-            response = ollama.chat(
-                model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 100,
-                    'temperature': 0.3,
-                }
-            )
-            
-            # v5.8.0: Structured格式解析，绝不使用thinking
-            msg = response.get('message', {})
-            result = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                result = msg.content.strip()
-            
-            # v5.7.3: content为空返回空
-            if result:
-                result = clean_narration_text(result)
-                result = self._filter_sensitive(result)
-            
-            return result if validate_narration(result) else ""
-            
-        except Exception:
-            return ""
-    
-    def _keyword_based_generate(self, dialogue: str, style: str) -> str:
-        """
-        v5.7.2：基于关键词生成（作为最后兜底）
-        提取对话中的关键动作/名词生成简单解说
+    def _optimize_continuity(
+        self,
+        scenes: List[SceneSegment],
+        gap_candidates: Optional[List[Dict]] = None
+    ) -> List[SceneSegment]:
         """
-        if not dialogue:
-            return ""
+        优化剧情连贯性（去重 + 连续解说限制，单次遍历）
         
-        try:
-            import ollama
-            
-            # v5.7.2: 极简prompt
-            prompt = f"/no_think\n动作（5字）：{dialogue[:25]}\n输出："
-            
-            response = ollama.chat(
-                model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 50,
-                    'temperature': 0.2,
-                }
-            )
-            
-            # v5.8.0: Structured格式解析，绝不使用thinking
-            msg = response.get('message', {})
-            result = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                result = msg.content.strip()
-            
-            # v5.7.3: content为空返回空
-            if result:
-                result = clean_narration_text(result)
-                result = self._filter_sensitive(result)
-            
-            return result if len(result) >= 5 else ""
-            
-        except Exception:
-            return ""
-    
-    def _optimize_continuity(self, scenes: List[SceneSegment]) -> List[SceneSegment]:
-        """
-        优化剧情连贯性
+        参数：
+            gap_candidates: 传入列表时，顺带收集保留下来的解说场景（静音检测用）
         """
-        # 规则1：去除重复解说
-        scenes = self._remove_duplicate_narrations(scenes)
-        
         # 规则2：不能连续过多解说（但允许更多）
         max_consecutive = 10 if self.media_type == "tv" else 6
         consecutive_voiceover = 0
-        
-        for scene in scenes:
-            if scene.audio_mode == AudioMode.VOICEOVER:
-                consecutive_voiceover += 1
-                if consecutive_voiceover > max_consecutive and scene.dialogue:
-                    scene.audio_mode = AudioMode.ORIGINAL
-                    scene.narration = ""
-                    scene.reason = "防止连续解说"
-                    consecutive_voiceover = 0
-            else:
-                consecutive_voiceover = 0
-        
-        return scenes
-    
-    def _remove_duplicate_narrations(self, scenes: List[SceneSegment]) -> List[SceneSegment]:
-        """检测并去除重复解说"""
         last_narration = ""
+        # 连续解说中最近3条的n-gram集合（检测部分重合的相似解说）
+        recent_shingles = deque(maxlen=3)
         
         for scene in scenes:
             if scene.audio_mode != AudioMode.VOICEOVER:
                 last_narration = ""
+                recent_shingles.clear()
+                consecutive_voiceover = 0
                 continue
             
+            # 规则1：去除重复解说
             if scene.narration:
-                # 完全相同
-                if scene.narration == last_narration:
+                shingles = narration_shingles(scene.narration)
+                reason = self._is_duplicate_narration(
+                    scene.narration, last_narration, shingles, recent_shingles
+                )
+                if reason:
                     scene.audio_mode = AudioMode.ORIGINAL
-                    scene.reason = "去除重复解说"
+                    scene.reason = reason
                     scene.narration = ""
+                    consecutive_voiceover = 0
                     continue
-                
-                # 相似度检查
-                if last_narration and len(scene.narration) > 5:
-                    if scene.narration in last_narration or last_narration in scene.narration:
-                        scene.audio_mode = AudioMode.ORIGINAL
-                        scene.reason = "去除相似解说"
-                        scene.narration = ""
-                        continue
+                recent_shingles.append(shingles)
             
             last_narration = scene.narration
+            
+            consecutive_voiceover += 1
+            if consecutive_voiceover > max_consecutive and scene.dialogue:
+                scene.audio_mode = AudioMode.ORIGINAL
+                scene.narration = ""
+                scene.reason = "防止连续解说"
+                consecutive_voiceover = 0
+                continue
+            
+            if gap_candidates is not None and scene.narration:
+                gap_candidates.append(self._scene_to_dict(scene))
         
         return scenes
     
-    def _compile_narration_text(self, scenes: List[SceneSegment]) -> str:
-        """编译完整解说文本（v5.6增强：包含钩子和结尾）"""
-        narrations = []
+    def _is_duplicate_narration(
+        self,
+        narration: str,
+        last_narration: str,
+        shingles: Optional[set] = None,
+        recent_shingles=()
+    ) -> str:
+        """
+        检测重复解说，返回去除原因（不重复返回空字符串）
         
-        # v5.6：添加钩子开场
-        if self.hook_opening:
-            narrations.append(f"[开场] {self.hook_opening}")
-            narrations.append("")  # 空行分隔
+        参数：
+            shingles: 当前解说的n-gram集合（narration_shingles）
+            recent_shingles: 最近几条解说的n-gram集合，Jaccard相似度超过阈值视为相似
+        """
+        # 完全相同
+        if narration == last_narration:
+            return "去除重复解说"
         
-        # 主体解说
-        for scene in scenes:
-            if scene.audio_mode == AudioMode.VOICEOVER and scene.narration:
-                narrations.append(scene.narration)
+        # 相似度检查
+        if last_narration and len(narration) > 5:
+            if narration in last_narration or last_narration in narration:
+                return "去除相似解说"
+        
+        if shingles:
+            for prev in recent_shingles:
+                if len(shingles & prev) > DUPLICATE_SIMILARITY * len(shingles | prev):
+                    return "去除相似解说"
+        
+        return ""
+    
+    def _compile_narration_text(self, scenes: List[SceneSegment]) -> str:
+        """编译完整解说文本（v5.6增强：包含钩子和结尾）"""
+        # 主体解说（枚举成员绑定到局部变量，用is比较）
+        VOICEOVER = AudioMode.VOICEOVER
+        narrations = [s.narration for s in scenes if s.audio_mode is VOICEOVER and s.narration]
         
-        # v5.6：添加悬念结尾
-        if self.suspense_ending:
-            narrations.append("")  # 空行分隔
-            narrations.append(f"[结尾] {self.suspense_ending}")
+        # v5.6：钩子开场和悬念结尾（空行分隔）
+        opening = (f"[开场] {self.hook_opening}", "") if self.hook_opening else ()
+        ending = ("", f"[结尾] {self.suspense_ending}") if self.suspense_ending else ()
         
-        return "\n".join(narrations)
+        return "\n".join((*opening, *narrations, *ending))
     
     def _is_ad_content(self, text: str) -> bool:
         """
         v5.7.1：检测广告内容
         """
-        if not text:
-            return False
-        
-        # 广告特征模式
-        ad_patterns = [
-            r'用痛[﹔;]',
-            r'用经敌',
-            r'家中常备',
-            r'邀您观看',
-            r'教您观看',
-            r'巨颗话谈',
-            r'苦红利焉',
-            r'精通电子案',
-            r'穿被皮发膏',
-            r'赞助播出',
-            r'独家冠名',
-            r'[﹔;]{3,}',  # 连续分号（Whisper乱码特征）
-        ]
-        
-        for pattern in ad_patterns:
-            if re.search(pattern, text):
-                return True
-        
-        # 高密度分号检测（广告乱码特征）
-        if text.count('﹔') > 2 or text.count(';') > 3:
-            return True
-        
-        return False
+        return _is_ad_content_impl(text)
     
     def _filter_sensitive(self, text: str) -> str:
         """过滤敏感词"""
-        if not text:
-            return ""
-        result = text
-        for word in SENSITIVE_WORDS:
-            if word in result:
-                result = result.replace(word, "")
-        return result.strip()
+        return _filter_sensitive_impl(text)
     
     def _is_low_quality(self, text: str) -> bool:
         """检查是否是低质量内容"""
         if not text or len(text) < 5:
             return True
-        for pattern in BAD_PATTERNS:
-            if pattern in text:
-                return True
-        return False
+        return _BAD_PATTERN_RE.search(text) is not None
 
 
 def create_production_timeline(scenes: List[SceneSegment]) -> List[Dict]:
     """创建最终制作时间线"""
-    timeline = []
-    output_time = 0.0
+    active = [s for s in scenes if s.audio_mode is not AudioMode.SKIP]
     
-    for scene in scenes:
-        if scene.audio_mode == AudioMode.SKIP:
-            continue
-        
-        item = {
+    # 输出时间轴 = 时长累加（一次accumulate得到各段边界，第i段为[i, i+1]）
+    boundaries = list(accumulate((s.duration for s in active), initial=0.0))
+    output_starts, output_ends = boundaries[:-1], boundaries[1:]
+    
+    return [
+        {
             'scene_id': scene.scene_id,
             'source_start': scene.start_time,
             'source_end': scene.end_time,
-            'output_start': output_time,
-            'output_end': output_time + scene.duration,
+            'output_start': output_start,
+            'output_end': output_end,
             'audio_mode': scene.audio_mode.value,
             'narration': scene.narration,
             'dialogue': scene.dialogue,
             'emotion': scene.emotion,
             'reason': scene.reason,
         }
-        
-        timeline.append(item)
-        output_time += scene.duration
-    
-    return timeline
+        for scene, output_start, output_end in zip(active, output_starts, output_ends)
+    ]
 
 
 # 测试
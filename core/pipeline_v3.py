@@ -21,11 +21,16 @@ SmartVideoClipper v3.0 - 解说驱动剪辑管线
 """
 
 import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
 import sys
+import threading
 from pathlib import Path
 from typing import Optional, Callable
 from datetime import datetime
+from itertools import accumulate
 
 # 设置环境
 os.environ["HF_ENDPOINT"] = "https://hf-mirror.com"
@@ -36,18 +41,85 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(PROJECT_ROOT / "core"))
 
-from intro_outro_detect import auto_trim_intro_outro
+from intro_outro_detect import auto_trim_intro_outro, get_video_duration
 from story_understanding import StoryUnderstanding
 from script_generator import ScriptGenerator
-from semantic_matcher import SemanticMatcher, SmartClipper
+from semantic_matcher import SemanticMatcher, SmartClipper, file_fingerprint
 from scene_detect import detect_scenes
 from transcribe import transcribe_video
 from tts_synthesis import TTSEngine
-from smart_cut import extract_clips, concat_clips, VIDEO_ENCODER
-from compose_video import compose_final_video, add_subtitles, convert_to_douyin
+from smart_cut import extract_clips, concat_clips, extract_and_concat, VIDEO_ENCODER
+from compose_video import compose_final_video, convert_to_douyin
 from remove_silence import remove_silence
 from plot_fetcher import PlotFetcher, get_plot_info, summarize_plot_from_transcript, parse_episode_from_filename
 
+# orjson可选加速（写剧情分析JSON），不可用时退回标准库
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 步骤缓存清单（工作目录内），记录与风格无关步骤的输入指纹和结果
+MANIFEST_NAME = "manifest.json"
+
+
+def _dump_json(path, data):
+    """写JSON文件（orjson可用时直接输出UTF-8字节；先写临时文件再替换，避免中断留下半个文件）"""
+    tmp_path = str(path) + '.tmp'
+    written = False
+    if ORJSON_AVAILABLE:
+        try:
+            # orjson 直接输出UTF-8，无需 ensure_ascii
+            Path(tmp_path).write_bytes(orjson.dumps(
+                data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ))
+            written = True
+        except TypeError:
+            pass  # 含 orjson 不支持的类型，交给标准库
+    if not written:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# 进程内共享的重模型引擎（CLIP 匹配器、TTS），后台线程加载
+_ENGINE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+_SHARED_ENGINES = {}
+_SHARED_ENGINES_LOCK = threading.Lock()
+
+
+def _shared_engine(name: str, factory: Callable):
+    """
+    获取共享引擎的 Future：首次调用时提交后台加载，之后所有管线实例复用
+    
+    加载失败的不缓存，下次调用重新加载。共享实例不是线程安全的，
+    同一进程内的多个 process() 需串行执行
+    """
+    with _SHARED_ENGINES_LOCK:
+        future = _SHARED_ENGINES.get(name)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _ENGINE_POOL.submit(factory)
+            _SHARED_ENGINES[name] = future
+        return future
+
+
+def _create_matcher() -> SemanticMatcher:
+    return SemanticMatcher(cache_dir=str(PROJECT_ROOT / "cache" / "clip_embeddings")).to_fp16()
+
+
+# 分句：句号/感叹号/问号之后，以及原有换行处
+_SENT_SPLIT_RE = re.compile(r'(?<=[。！？])|\n')
+
+# 时间线为空且没有镜头信息时的默认取材位置（占视频时长的比例）
+_DEFAULT_FRACTIONS = (
+    (0.05, 0.1),   # 开头
+    (0.25, 0.35),  # 前半
+    (0.5, 0.6),    # 中间
+    (0.7, 0.8),    # 高潮
+    (0.9, 0.95),   # 结尾
+)
 
 # 处理步骤
 PROCESS_STEPS_V3 = [
@@ -72,9 +144,23 @@ class VideoPipelineV3:
     def __init__(self):
         self.story_engine = StoryUnderstanding()
         self.script_generator = ScriptGenerator()
-        self.semantic_matcher = SemanticMatcher()
         self.smart_clipper = SmartClipper()
-        self.tts_engine = TTSEngine()
+        # 全流程统一的视频编码器（gpu_encoder 检测：NVENC/QSV/AMF/VideoToolbox/libx264）
+        self.video_encoder = VIDEO_ENCODER
+        
+        # CLIP 和 TTS 模型加载较慢，在后台线程并行加载，
+        # 与 Step 0-4（去片头、语音识别、LLM）重叠，首次使用时才等待；
+        # 模型在进程内共享，多次创建管线（如服务端逐个处理请求）不重复加载
+        self._matcher_future = _shared_engine('matcher', _create_matcher)
+        self._tts_future = _shared_engine('tts', TTSEngine)
+    
+    @property
+    def semantic_matcher(self) -> SemanticMatcher:
+        return self._matcher_future.result()
+    
+    @property
+    def tts_engine(self) -> TTSEngine:
+        return self._tts_future.result()
     
     async def process(
         self,
@@ -84,11 +170,18 @@ class VideoPipelineV3:
         style: str = "幽默",
         target_duration: int = 300,
         progress_callback: Optional[Callable] = None,
-        skip_intro_outro: bool = False
+        skip_intro_outro: bool = False,
+        force: bool = False,
+        keep_intermediates: bool = False,
+        hard_subtitles: bool = False
     ) -> dict:
         """
         执行完整处理流程
         
+        与风格无关的步骤（去片头、联网搜索、语音识别、剧情理解、场景检测）
+        结果记录在工作目录的 manifest.json，输入指纹不变时直接复用；
+        只改风格/时长重跑时，只需重新生成剧本、匹配、剪辑、配音和合成
+        
         参数：
             input_video: 输入视频路径
             movie_name: 电影/剧集名称（用于联网搜索）
@@ -97,6 +190,9 @@ class VideoPipelineV3:
             target_duration: 目标时长（秒）
             progress_callback: 进度回调函数
             skip_intro_outro: 是否跳过片头片尾检测
+            force: 忽略步骤缓存，全部重新计算
+            keep_intermediates: 保留中间视频（片段、拼接结果），默认用完即删
+            hard_subtitles: 把字幕烧录进画面；默认封装为软字幕轨（抖音支持），不额外占编码
         
         返回：
             {
@@ -118,6 +214,21 @@ class VideoPipelineV3:
                 progress_callback(step, TOTAL_STEPS_V3, step_name, detail)
             print(f"\n[Step {step}] {detail}")
         
+        # 步骤缓存
+        manifest_path = work_dir / MANIFEST_NAME
+        manifest = {} if force else self._load_manifest(manifest_path)
+        
+        def cached(step: str, key: str):
+            entry = manifest.get(step)
+            if entry and entry.get('key') == key:
+                print(f"   [CACHE] 复用上次结果: {step}")
+                return entry['data']
+            return None
+        
+        def remember(step: str, key: str, data):
+            manifest[step] = {'key': key, 'data': data}
+            self._save_manifest(manifest_path, manifest)
+        
         # 打印头部信息
         self._print_header(input_video, movie_name, style, target_duration)
         
@@ -125,7 +236,12 @@ class VideoPipelineV3:
             # ========== Step 0: 预处理 ==========
             report_progress(0, "正在检测片头片尾...")
             
-            if skip_intro_outro:
+            trim_key = f"{file_fingerprint(input_video)}|{skip_intro_outro}"
+            trim_result = cached('trim', trim_key)
+            if trim_result and os.path.exists(trim_result['processed_video']):
+                processed_video = trim_result['processed_video']
+                intro_offset = trim_result['intro_offset']
+            elif skip_intro_outro:
                 processed_video = input_video
                 intro_offset = 0
             else:
@@ -135,17 +251,51 @@ class VideoPipelineV3:
                 )
                 if processed_video != input_video:
                     print(f"   ✓ 已去除片头: {intro_offset:.1f}秒")
+                remember('trim', trim_key, {
+                    'processed_video': processed_video,
+                    'intro_offset': intro_offset,
+                })
+            
+            video_key = file_fingerprint(processed_video)
             
             # ========== Step 1: 联网搜索（前置！）==========
             report_progress(1, f"正在搜索《{movie_name or '未知'}》的信息...")
             
             # 使用新的 PlotFetcher 获取剧情
+            # 联网搜索与语音识别互不依赖，放到线程里并发执行，Step 3 前再汇合
             season, episode = parse_episode_from_filename(input_video)
-            plot_info = get_plot_info(
-                video_path=input_video,
-                title=movie_name,
-                api_key=os.environ.get("TMDB_API_KEY", "")
-            )
+            plot_key = f"{video_key}|{Path(input_video).name}|{movie_name}"
+            plot_info = cached('plot', plot_key)
+            search_task = None
+            if plot_info is None:
+                search_task = asyncio.create_task(asyncio.to_thread(
+                    get_plot_info,
+                    video_path=input_video,
+                    title=movie_name,
+                    api_key=os.environ.get("TMDB_API_KEY", "")
+                ))
+            
+            # ========== Step 2: 语音识别 ==========
+            report_progress(2, "正在识别视频对白...")
+            
+            subtitle_path = str(work_dir / "subtitles.srt")
+            asr_result = cached('asr', video_key)
+            asr_task = None
+            if asr_result is None:
+                asr_task = asyncio.create_task(asyncio.to_thread(
+                    transcribe_video,
+                    processed_video,
+                    output_srt=subtitle_path
+                ))
+            await asyncio.gather(*[t for t in (search_task, asr_task) if t])
+            
+            if search_task:
+                plot_info = search_task.result()
+            if asr_task:
+                segments, transcript = asr_task.result()
+                remember('asr', video_key, {'segments': segments, 'transcript': transcript})
+            else:
+                segments, transcript = asr_result['segments'], asr_result['transcript']
             
             if plot_info.get('overview'):
                 print(f"   ✓ 获取到 {len(plot_info['overview'])} 字剧情简介")
@@ -153,15 +303,6 @@ class VideoPipelineV3:
                     print(f"   ✓ 识别到 {len(plot_info['cast'])} 个主要演员")
             else:
                 print("   [INFO] 外部API未获取到信息，将使用AI分析字幕")
-            
-            # ========== Step 2: 语音识别 ==========
-            report_progress(2, "正在识别视频对白...")
-            
-            subtitle_path = str(work_dir / "subtitles.srt")
-            segments, transcript = transcribe_video(
-                processed_video,
-                output_srt=subtitle_path
-            )
             print(f"   ✓ 识别到 {len(segments)} 段对白")
             
             # 如果API没有获取到剧情，用AI分析字幕生成
@@ -171,27 +312,41 @@ class VideoPipelineV3:
                 if ai_summary:
                     plot_info['overview'] = ai_summary
                     plot_info['source'] = 'ai'
+            if search_task:
+                remember('plot', plot_key, plot_info)
+            
+            # 场景检测只依赖视频本身，在剧情理解/剧本生成（LLM）期间后台执行
+            scenes = cached('scenes', video_key)
+            scene_task = None
+            if scenes is None:
+                scene_task = asyncio.create_task(asyncio.to_thread(
+                    detect_scenes, processed_video, str(work_dir)
+                ))
             
             # ========== Step 3: 剧情理解 ==========
             report_progress(3, "正在深度分析剧情...")
             
-            # 传递外部获取的剧情信息
-            story_understanding = self.story_engine.understand(
-                movie_name=movie_name or "未知作品",
-                transcript_segments=segments,
-                full_transcript=transcript,
-                external_plot_info=plot_info  # 新增参数
-            )
+            # 剧情理解的输入（字幕+剧情信息）都由 plot_key 覆盖
+            story_understanding = cached('story', plot_key)
+            if story_understanding is None:
+                # 传递外部获取的剧情信息
+                story_understanding = await asyncio.to_thread(
+                    self.story_engine.understand,
+                    movie_name=movie_name or "未知作品",
+                    transcript_segments=segments,
+                    full_transcript=transcript,
+                    external_plot_info=plot_info  # 新增参数
+                )
+                remember('story', plot_key, story_understanding)
             
             # 保存剧情理解结果
-            import json
-            with open(work_dir / "story_analysis.json", 'w', encoding='utf-8') as f:
-                json.dump(story_understanding, f, ensure_ascii=False, indent=2)
+            await self._write_json_async(work_dir / "story_analysis.json", story_understanding)
             
             # ========== Step 4: 生成剧本 ==========
             report_progress(4, f"正在创作{style}风格解说剧本...")
             
-            script_segments = self.script_generator.generate(
+            script_segments = await asyncio.to_thread(
+                self.script_generator.generate,
                 story_understanding=story_understanding,
                 target_duration=target_duration,
                 style=style
@@ -200,15 +355,16 @@ class VideoPipelineV3:
             # 保存剧本
             script_text = self._format_script(script_segments)
             script_path = work_dir / "解说剧本.txt"
-            with open(script_path, 'w', encoding='utf-8') as f:
-                f.write(script_text)
+            await self._write_text_async(script_path, script_text)
             print(f"   ✓ 剧本已保存: {script_path}")
             
             # ========== Step 5: 素材匹配 ==========
             report_progress(5, "正在为解说匹配最佳画面...")
             
-            # 先做场景检测
-            scenes, _ = detect_scenes(processed_video, str(work_dir))
+            # 场景检测已在 Step 3 前启动，这里等待结果
+            if scene_task:
+                scenes, _ = await scene_task
+                remember('scenes', video_key, scenes)
             
             # 语义匹配
             matched_segments = self.semantic_matcher.match_segments(
@@ -218,14 +374,8 @@ class VideoPipelineV3:
                 scenes=scenes
             )
             
-            # 创建时间线 - 兼容 moviepy 1.x 和 2.x
-            try:
-                from moviepy import VideoFileClip
-            except ImportError:
-                from moviepy.editor import VideoFileClip
-            
-            with VideoFileClip(processed_video) as video:
-                video_duration = video.duration
+            # 创建时间线（ffprobe 只读容器时长，不必用 moviepy 打开整个视频）
+            video_duration = get_video_duration(processed_video)
             
             timeline = self.smart_clipper.create_timeline(
                 matched_segments, 
@@ -236,25 +386,28 @@ class VideoPipelineV3:
             # 如果时间线为空，创建默认时间线
             if not timeline:
                 print("   [WARNING] 时间线为空，创建默认片段")
-                # 默认取视频的几个关键位置
-                default_positions = [
-                    (video_duration * 0.05, video_duration * 0.1),   # 开头
-                    (video_duration * 0.25, video_duration * 0.35),  # 前半
-                    (video_duration * 0.5, video_duration * 0.6),    # 中间
-                    (video_duration * 0.7, video_duration * 0.8),    # 高潮
-                    (video_duration * 0.9, video_duration * 0.95),   # 结尾
-                ]
-                for i, (start, end) in enumerate(default_positions):
-                    timeline.append({
-                        'clip_id': i + 1,
-                        'segment_id': i + 1,
-                        'phase': f'段落{i+1}',
+                if scenes:
+                    # 取最长的5个镜头（边界对齐真实剪切点），按时间顺序排列
+                    longest = sorted(scenes, key=lambda sc: sc['end'] - sc['start'], reverse=True)[:5]
+                    default_positions = sorted((sc['start'], sc['end']) for sc in longest)
+                else:
+                    # 没有镜头信息时，取视频的几个关键位置
+                    default_positions = [
+                        (video_duration * a, video_duration * b) for a, b in _DEFAULT_FRACTIONS
+                    ]
+                timeline = [
+                    {
+                        'clip_id': i,
+                        'segment_id': i,
+                        'phase': f'段落{i}',
                         'source_start': start,
                         'source_end': end,
                         'narration_start': 0,
                         'narration_end': end - start,
                         'keep_original': False,
-                    })
+                    }
+                    for i, (start, end) in enumerate(default_positions, 1)
+                ]
             
             self.smart_clipper.print_timeline(timeline)
             
@@ -273,29 +426,47 @@ class VideoPipelineV3:
             clips_dir = work_dir / "clips"
             clips_dir.mkdir(exist_ok=True)
             
-            clip_files = extract_clips(processed_video, clips_to_extract, str(clips_dir))
-            print(f"   ✓ 提取了 {len(clip_files)} 个片段")
-            
-            # 如果没有提取到片段，使用原视频
-            if not clip_files:
-                print("   [WARNING] 未提取到片段，使用原视频")
-                concat_path = processed_video
-            else:
-                # 拼接
+            def cut_and_concat() -> str:
                 concat_path = str(work_dir / "剪辑后.mp4")
+                
+                # 优先一次FFmpeg完成截取+拼接，失败再逐段提取后拼接
+                try:
+                    return extract_and_concat(processed_video, clips_to_extract, concat_path)
+                except (RuntimeError, ValueError) as e:
+                    print(f"   [INFO] {e}，改为逐段提取")
+                
+                clip_files = extract_clips(processed_video, clips_to_extract, str(clips_dir))
+                print(f"   ✓ 提取了 {len(clip_files)} 个片段")
+                
+                # 如果没有提取到片段，使用原视频
+                if not clip_files:
+                    print("   [WARNING] 未提取到片段，使用原视频")
+                    return processed_video
+                # 拼接
                 concat_clips(clip_files, concat_path)
+                if not keep_intermediates:
+                    self._remove_files(clip_files)
+                return concat_path
+            
+            # 剪辑(ffmpeg)与配音(TTS)互不依赖，并发执行，Step 8 前汇合
+            # 先创建剪辑任务：ChatTTS 是同步合成，会占住事件循环，剪辑线程要先提交出去
+            concat_task = asyncio.create_task(asyncio.to_thread(cut_and_concat))
             
             # ========== Step 7: 语音合成 ==========
             report_progress(7, "正在生成解说配音...")
             
-            # 提取纯文本
-            full_narration = '\n'.join([
-                seg.get('narration_text', '')
+            # 按句切分（与字幕分句一致），整批交给TTS
+            sentences = [
+                sent
                 for seg in matched_segments
-            ])
+                for sent in self._split_sentences(seg.get('narration_text', ''))
+            ]
             
             narration_path = str(work_dir / "narration.wav")
-            await self.tts_engine.synthesize(full_narration, narration_path)
+            # TTS 引擎可能仍在后台加载，异步等待，不阻塞事件循环里的剪切拼接
+            tts_engine = await asyncio.wrap_future(self._tts_future)
+            tts_task = asyncio.create_task(tts_engine.synthesize_batch(sentences, narration_path))
+            concat_path, sentence_durations = await asyncio.gather(concat_task, tts_task)
             print(f"   ✓ 配音已生成: {narration_path}")
             
             # ========== Step 8: 合成输出 ==========
@@ -308,26 +479,39 @@ class VideoPipelineV3:
                 if item.get('keep_original')
             ]
             
-            # 合成
+            # 合成与写字幕文件都在后台线程，并发执行
             final_path = str(work_dir / f"{output_name}.mp4")
-            compose_final_video(
+            compose_task = asyncio.create_task(asyncio.to_thread(
+                compose_final_video,
                 video_path=concat_path,
                 narration_path=narration_path,
                 output_path=final_path,
                 keep_original_segments=keep_original_segments,
                 mode="mix"
-            )
+            ))
             
             # 添加字幕
             subtitle_path = str(work_dir / "subtitles.srt")
-            self._generate_subtitles(matched_segments, subtitle_path)
+            await asyncio.gather(
+                compose_task,
+                asyncio.to_thread(
+                    self._generate_subtitles, matched_segments, subtitle_path, sentence_durations
+                )
+            )
             
-            final_with_sub = str(work_dir / f"{output_name}_sub.mp4")
-            add_subtitles(final_path, subtitle_path, final_with_sub)
+            # 拼接结果已合成进成片，不再需要
+            if not keep_intermediates and concat_path != processed_video:
+                self._remove_files([concat_path])
             
-            # 转抖音格式
+            # 转抖音格式（字幕在同一次转码里烧录或封装为软字幕）
             douyin_path = str(work_dir / f"{output_name}_抖音.mp4")
-            convert_to_douyin(final_with_sub, douyin_path)
+            # 成片音轨已是 AAC，直接复制，只重编码视频
+            convert_to_douyin(
+                final_path, douyin_path,
+                srt_path=subtitle_path,
+                copy_audio=True,
+                soft_subtitles=not hard_subtitles
+            )
             
             # 完成
             elapsed = (datetime.now() - start_time).seconds
@@ -350,29 +534,75 @@ class VideoPipelineV3:
     
     def _print_header(self, video, name, style, duration):
         """打印开始信息"""
-        print("\n" + "★"*60)
-        print("★  SmartVideoClipper v3.0 - 解说驱动剪辑")
-        print("★  ")
-        print("★  核心理念: 先理解故事 → 写解说 → 配画面")
-        print("★  " + "="*52)
-        print(f"★  开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"★  输入视频: {video}")
-        print(f"★  作品名称: {name or '未知'}")
-        print(f"★  解说风格: {style}")
-        print(f"★  目标时长: {duration}秒")
-        print("★"*60 + "\n")
+        print('\n'.join([
+            "\n" + "★"*60,
+            "★  SmartVideoClipper v3.0 - 解说驱动剪辑",
+            "★  ",
+            "★  核心理念: 先理解故事 → 写解说 → 配画面",
+            "★  " + "="*52,
+            f"★  开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"★  输入视频: {video}",
+            f"★  作品名称: {name or '未知'}",
+            f"★  解说风格: {style}",
+            f"★  目标时长: {duration}秒",
+            "★"*60 + "\n",
+        ]))
     
     def _print_footer(self, output, elapsed):
         """打印完成信息"""
         minutes = elapsed // 60
         seconds = elapsed % 60
-        print("\n" + "★"*60)
-        print("★  ✅ 处理完成！")
-        print("★  " + "="*52)
-        print(f"★  结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"★  总耗时: {minutes}分{seconds}秒")
-        print(f"★  输出文件: {output}")
-        print("★"*60)
+        print('\n'.join([
+            "\n" + "★"*60,
+            "★  ✅ 处理完成！",
+            "★  " + "="*52,
+            f"★  结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"★  总耗时: {minutes}分{seconds}秒",
+            f"★  输出文件: {output}",
+            "★"*60,
+        ]))
+    
+    @staticmethod
+    def _remove_files(paths: list):
+        """删除中间文件（释放磁盘，失败忽略）"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _load_manifest(path: Path) -> dict:
+        """读取步骤缓存清单（不存在或损坏时返回空）"""
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"   [WARNING] 步骤缓存读取失败，将全部重新计算: {e}")
+            return {}
+    
+    @staticmethod
+    def _save_manifest(path: Path, manifest: dict):
+        """写回步骤缓存清单（失败只影响下次复用，不中断流程）"""
+        try:
+            _dump_json(path, manifest)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"   [WARNING] 步骤缓存写入失败: {e}")
+    
+    @staticmethod
+    async def _write_text_async(path, text: str):
+        """在线程中写文本文件，不阻塞事件循环"""
+        def write():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        await asyncio.to_thread(write)
+    
+    @staticmethod
+    async def _write_json_async(path, data):
+        """在线程中写JSON文件，不阻塞事件循环"""
+        await asyncio.to_thread(_dump_json, path, data)
     
     def _format_script(self, segments: list) -> str:
         """格式化剧本为文本"""
@@ -391,36 +621,40 @@ class VideoPipelineV3:
         
         return '\n'.join(lines)
     
-    def _generate_subtitles(self, segments: list, output_path: str):
-        """生成SRT字幕文件"""
+    @staticmethod
+    def _split_sentences(text: str) -> list:
+        """按句号/感叹号/问号分句，去掉空句（字幕与配音共用）"""
+        sentences = _SENT_SPLIT_RE.split(text)
+        return [sent.strip() for sent in sentences if sent.strip()]
+    
+    def _generate_subtitles(self, segments: list, output_path: str, durations: list = None):
+        """
+        生成SRT字幕文件
+        
+        durations: TTS 返回的每句实际时长；没有（或句数对不上）时按字数估算
+        """
+        sentences = [
+            sent
+            for seg in segments
+            for sent in self._split_sentences(seg.get('narration_text', ''))
+        ]
+        
+        if not durations or len(durations) != len(sentences):
+            # 估算时长
+            durations = [max(2, len(sent) / 4) for sent in sentences]
+        
+        # 累加得到每句起止时间
+        cursors = list(accumulate(durations, initial=0.0))
+        
+        fmt = self._format_srt_time
+        parts = [
+            f"{idx}\n{fmt(cursors[idx - 1])} --> {fmt(cursors[idx])}\n{sent}\n\n"
+            for idx, sent in enumerate(sentences, 1)
+        ]
+        
+        # 整个文件一次写出
         with open(output_path, 'w', encoding='utf-8') as f:
-            idx = 1
-            time_cursor = 0.0
-            
-            for seg in segments:
-                text = seg.get('narration_text', '')
-                duration = seg.get('duration', 30)
-                
-                # 分句
-                sentences = text.replace('。', '。\n').replace('！', '！\n').split('\n')
-                
-                for sent in sentences:
-                    sent = sent.strip()
-                    if not sent:
-                        continue
-                    
-                    # 估算时长
-                    sent_duration = max(2, len(sent) / 4)
-                    
-                    start_time = self._format_srt_time(time_cursor)
-                    end_time = self._format_srt_time(time_cursor + sent_duration)
-                    
-                    f.write(f"{idx}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{sent}\n\n")
-                    
-                    idx += 1
-                    time_cursor += sent_duration
+            f.write(''.join(parts))
     
     def _format_srt_time(self, seconds: float) -> str:
         """格式化SRT时间"""
@@ -438,7 +672,9 @@ async def process_video_v3(
     output_name: str = "解说视频",
     style: str = "幽默",
     target_duration: int = 300,
-    progress_callback: Optional[Callable] = None
+    progress_callback: Optional[Callable] = None,
+    force: bool = False,
+    hard_subtitles: bool = False
 ) -> dict:
     """
     新版处理入口
@@ -450,7 +686,9 @@ async def process_video_v3(
         output_name=output_name,
         style=style,
         target_duration=target_duration,
-        progress_callback=progress_callback
+        progress_callback=progress_callback,
+        force=force,
+        hard_subtitles=hard_subtitles
     )
 
 
@@ -109,37 +109,51 @@ class VideoPipelineV4:
             api_key = tmdb_api_key or os.environ.get("TMDB_API_KEY", "")
             season, episode = parse_episode_from_filename(input_video)
             
-            plot_info = {}
-            if api_key:
+            def fetch_plot() -> dict:
+                if not api_key:
+                    return {}
                 fetcher = PlotFetcher(api_key)
-                plot_info = fetcher.fetch(
-                    title=movie_name or "未知",
-                    media_type="auto",
-                    season=season,
-                    episode=episode
-                )
-                fetcher.close()
-                
-                if plot_info.get('overview'):
-                    print(f"   ✓ TMDB获取成功：{len(plot_info['overview'])}字")
-            else:
-                print("   [INFO] 未配置TMDB API，跳过")
+                try:
+                    return fetcher.fetch(
+                        title=movie_name or "未知",
+                        media_type="auto",
+                        season=season,
+                        episode=episode
+                    )
+                finally:
+                    fetcher.close()
+            
+            # 剧情获取（网络）、语音识别、场景检测互不依赖，放到线程里并发执行，
+            # 场景内容分析前汇合
+            plot_task = asyncio.create_task(asyncio.to_thread(fetch_plot))
             
             # ========== Step 2: 语音识别 ==========
             report_progress(2, "正在识别视频对白...")
             
             subtitle_path = str(work_dir / "subtitles.srt")
-            segments, transcript = transcribe_video(
+            asr_task = asyncio.create_task(asyncio.to_thread(
+                transcribe_video,
                 processed_video,
                 output_srt=subtitle_path
-            )
-            print(f"   ✓ 识别到 {len(segments)} 段对白")
+            ))
             
             # ========== Step 3: 场景分析 ==========
             report_progress(3, "正在分析每个场景的内容...")
             
             # 检测场景
-            scenes, _ = detect_scenes(processed_video, str(work_dir))
+            scene_task = asyncio.create_task(asyncio.to_thread(
+                detect_scenes, processed_video, str(work_dir)
+            ))
+            
+            plot_info, (segments, transcript), (scenes, _) = await asyncio.gather(
+                plot_task, asr_task, scene_task
+            )
+            
+            if not api_key:
+                print("   [INFO] 未配置TMDB API，跳过")
+            elif plot_info.get('overview'):
+                print(f"   ✓ TMDB获取成功：{len(plot_info['overview'])}字")
+            print(f"   ✓ 识别到 {len(segments)} 段对白")
             print(f"   检测到 {len(scenes)} 个场景")
             
             # 分析场景内容
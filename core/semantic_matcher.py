@@ -12,13 +12,103 @@ SmartVideoClipper v3.0 - 语义匹配素材选择器
 这是实现"解说-画面同步"的关键！
 """
 
+import bisect
+import hashlib
+import subprocess
 import cv2
 import numpy as np
 import torch
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import os
 
 
+# CLIP 采样间隔（秒）与采样帧高度（CLIP 预处理会缩到 224，无需原分辨率）
+CLIP_SAMPLE_INTERVAL = 3.0
+CLIP_SAMPLE_HEIGHT = 224
+
+# CLIP 图像向量磁盘缓存：同一视频重跑（换风格/失败重试）时不再重复推理
+CLIP_MODEL_NAME = "ViT-B-16"
+CLIP_EMBED_CACHE_DIR = os.path.join('.', 'cache', 'clip_embeddings')
+_HASH_HEAD_BYTES = 1 << 20
+
+_JPEG_SOI = b'\xff\xd8'
+_JPEG_EOI = b'\xff\xd9'
+
+
+def file_fingerprint(path: str) -> str:
+    """文件指纹：前1MB内容 + 文件大小（不读整个文件）"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        h.update(f.read(_HASH_HEAD_BYTES))
+    h.update(str(os.path.getsize(path)).encode())
+    return h.hexdigest()[:16]
+
+
+def video_cache_key(video_path: str) -> str:
+    """向量缓存键：视频指纹 + 模型/采样参数"""
+    key = f"{file_fingerprint(video_path)}|{CLIP_MODEL_NAME}|{CLIP_SAMPLE_HEIGHT}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _ts_key(t: float) -> int:
+    """采样时间戳 → 缓存键（毫秒）"""
+    return int(round(t * 1000))
+
+
+def sample_frames_stream(
+    video_path: str,
+    start: float,
+    end: float,
+    interval: float = CLIP_SAMPLE_INTERVAL,
+    height: int = CLIP_SAMPLE_HEIGHT
+) -> Iterator[Tuple[float, bytes]]:
+    """
+    单个 ffmpeg 进程顺序解码，按固定间隔输出 MJPEG 帧
+    
+    替代逐帧 CAP_PROP_POS_FRAMES 跳转：每次跳转都要回到关键帧重新解码，
+    这里一次顺序读完，按 SOI/EOI 标记从 stdout 切出每张 JPEG
+    
+    返回：
+        (时间戳秒, JPEG字节) 迭代器
+    """
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-ss', f'{start:.3f}',
+        '-i', video_path,
+        '-t', f'{max(end - start, 0):.3f}',
+        '-vf', f'fps=1/{interval},scale=-2:{height}',
+        '-f', 'image2pipe',
+        '-vcodec', 'mjpeg',
+        '-q:v', '3',
+        '-'
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    buf = b''
+    index = 0
+    try:
+        while True:
+            chunk = proc.stdout.read(1 << 16)
+            if not chunk:
+                break
+            buf += chunk
+            while True:
+                soi = buf.find(_JPEG_SOI)
+                if soi < 0:
+                    buf = b''
+                    break
+                eoi = buf.find(_JPEG_EOI, soi + 2)
+                if eoi < 0:
+                    buf = buf[soi:]
+                    break
+                yield start + index * interval, buf[soi:eoi + 2]
+                index += 1
+                buf = buf[eoi + 2:]
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
 class SemanticMatcher:
     """
     语义匹配器
@@ -27,11 +117,18 @@ class SemanticMatcher:
     输出：每段解说对应的精确视频片段
     """
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = CLIP_EMBED_CACHE_DIR):
+        """
+        参数：
+            cache_dir: CLIP图像向量缓存目录（None 表示不缓存）
+        """
         self.clip_model = None
         self.clip_preprocess = None
         self.tokenizer = None
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.cache_dir = cache_dir
+        self._embed_cache = {}
+        self._embed_cache_dirty = False
         self._load_clip()
     
     def _load_clip(self):
@@ -42,7 +139,7 @@ class SemanticMatcher:
             
             print("[CLIP] 加载 Chinese-CLIP 模型...")
             self.clip_model, self.clip_preprocess = load_from_name(
-                "ViT-B-16",
+                CLIP_MODEL_NAME,
                 device=self.device,
                 download_root='./models'
             )
@@ -50,10 +147,62 @@ class SemanticMatcher:
             self.tokenizer = clip.tokenize
             print(f"[CLIP] 模型加载完成，设备: {self.device}")
             
+            if self.device == 'cuda':
+                # 输入尺寸固定（224），让 cuDNN 选最快的卷积实现
+                torch.backends.cudnn.benchmark = True
+            
         except Exception as e:
             print(f"[WARNING] CLIP加载失败: {e}")
             self.clip_model = None
     
+    def to_fp16(self):
+        """GPU 上以 FP16 推理（CPU 不支持半精度卷积，保持 FP32）"""
+        if self.clip_model is not None and self.device == 'cuda':
+            self.clip_model.half()
+            print("[CLIP] 使用 FP16 推理")
+        return self
+    
+    def _embed_cache_path(self, video_path: str) -> Optional[str]:
+        """当前视频的向量缓存文件路径"""
+        if not self.cache_dir:
+            return None
+        try:
+            return os.path.join(self.cache_dir, f"{video_cache_key(video_path)}.npz")
+        except OSError:
+            return None
+    
+    def _load_embed_cache(self, cache_path: Optional[str]):
+        """读取向量缓存 {毫秒时间戳: 向量}"""
+        self._embed_cache = {}
+        self._embed_cache_dirty = False
+        if not cache_path or not os.path.exists(cache_path):
+            return
+        try:
+            with np.load(cache_path) as data:
+                self._embed_cache = dict(zip(data['ts'].tolist(), data['feats']))
+            print(f"   [CLIP] 读取缓存向量 {len(self._embed_cache)} 个")
+        except Exception as e:
+            print(f"   [WARNING] CLIP缓存读取失败: {e}")
+    
+    def _save_embed_cache(self, cache_path: Optional[str]):
+        """写回向量缓存（先写临时文件再替换，避免中断留下半个文件）"""
+        if not cache_path or not self._embed_cache_dirty or not self._embed_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            keys = sorted(self._embed_cache)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    ts=np.array(keys, dtype=np.int64),
+                    feats=np.stack([self._embed_cache[k] for k in keys])
+                )
+            os.replace(tmp_path, cache_path)
+            self._embed_cache_dirty = False
+        except Exception as e:
+            print(f"   [WARNING] CLIP缓存写入失败: {e}")
+    
     def match_segments(
         self,
         video_path: str,
@@ -89,6 +238,36 @@ class SemanticMatcher:
         print(f"   视频时长: {total_duration:.0f}秒")
         print(f"   解说段落: {len(script_segments)}段")
         
+        # CLIP 要用的帧一次性顺序采样（覆盖所有段落的搜索范围），各段按时间查表
+        frame_bank = None
+        clip_ranges = [
+            seg.get('source_time_range', [0, total_duration])
+            for seg in script_segments
+            if seg.get('scene_description')
+        ]
+        cache_path = None
+        if self.clip_model and clip_ranges:
+            cache_path = self._embed_cache_path(video_path)
+            self._load_embed_cache(cache_path)
+            
+            range_start = max(0.0, min(r[0] for r in clip_ranges))
+            range_end = max(r[1] for r in clip_ranges)
+            grid = np.arange(range_start, range_end, CLIP_SAMPLE_INTERVAL).tolist()
+            
+            if grid and all(_ts_key(t) in self._embed_cache for t in grid):
+                # 所有采样点都有缓存向量，无需再解码视频
+                frame_bank = [(t, b'') for t in grid]
+                print(f"   [CLIP] 全部 {len(grid)} 个采样点命中缓存")
+            else:
+                try:
+                    frame_bank = list(sample_frames_stream(video_path, range_start, range_end))
+                    print(f"   [CLIP] 顺序采样 {len(frame_bank)} 帧")
+                except Exception as e:
+                    print(f"   [WARNING] ffmpeg采样失败，回退逐帧读取: {e}")
+                    frame_bank = None
+                if not frame_bank:
+                    frame_bank = None
+        
         # 为每段匹配素材
         for i, seg in enumerate(script_segments):
             print(f"\n[{i+1}/{len(script_segments)}] 匹配: {seg.get('phase', '未知段落')}")
@@ -107,7 +286,8 @@ class SemanticMatcher:
             # 策略1：基于CLIP的视觉匹配
             if self.clip_model and scene_desc:
                 clip_matches = self._match_by_clip(
-                    cap, fps, scene_desc, start_time, end_time
+                    cap, fps, scene_desc, start_time, end_time,
+                    frame_bank=frame_bank
                 )
                 matched_clips.extend(clip_matches)
                 print(f"   [CLIP] 找到 {len(clip_matches)} 个匹配")
@@ -145,6 +325,7 @@ class SemanticMatcher:
             print(f"   ✓ 最终选取 {len(final_clips)} 个片段")
         
         cap.release()
+        self._save_embed_cache(cache_path)
         
         print("\n" + "="*60)
         print("✅ 素材匹配完成！")
@@ -159,7 +340,8 @@ class SemanticMatcher:
         scene_description: str,
         start_time: float,
         end_time: float,
-        sample_interval: float = 3.0
+        sample_interval: float = CLIP_SAMPLE_INTERVAL,
+        frame_bank: Optional[List[Tuple[float, bytes]]] = None
     ) -> List[Dict]:
         """使用CLIP进行视觉-文本匹配"""
         
@@ -174,33 +356,39 @@ class SemanticMatcher:
             
             # 编码文本
             text = self.tokenizer([scene_description]).to(self.device)
-            with torch.no_grad():
+            with torch.inference_mode():
                 text_features = self.clip_model.encode_text(text)
                 text_features /= text_features.norm(dim=-1, keepdim=True)
+            text_vector = text_features[0].float().cpu().numpy()
             
             # 采样帧并计算相似度
             candidates = []
             
-            for t in np.arange(start_time, end_time, sample_interval):
-                frame_num = int(t * fps)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                ret, frame = cap.read()
-                
-                if not ret or frame is None:
-                    continue
-                
-                # 转换为PIL图像
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(frame_rgb)
-                
-                # 预处理并编码
-                image_input = self.clip_preprocess(pil_image).unsqueeze(0).to(self.device)
-                with torch.no_grad():
-                    image_features = self.clip_model.encode_image(image_input)
-                    image_features /= image_features.norm(dim=-1, keepdim=True)
+            for t, frame in self._iter_frames(
+                cap, fps, start_time, end_time, sample_interval, frame_bank,
+                cached=self._embed_cache
+            ):
+                image_vector = self._embed_cache.get(_ts_key(t))
+                if image_vector is None:
+                    if frame is None:
+                        continue
+                    # 转换为PIL图像
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    pil_image = Image.fromarray(frame_rgb)
+                    
+                    # 预处理并编码
+                    image_input = self.clip_preprocess(pil_image).unsqueeze(0).to(
+                        self.device, dtype=next(self.clip_model.parameters()).dtype
+                    )
+                    with torch.inference_mode():
+                        image_features = self.clip_model.encode_image(image_input)
+                        image_features /= image_features.norm(dim=-1, keepdim=True)
+                    image_vector = image_features[0].float().cpu().numpy()
+                    self._embed_cache[_ts_key(t)] = image_vector
+                    self._embed_cache_dirty = True
                 
                 # 计算相似度
-                similarity = (text_features @ image_features.T).item()
+                similarity = float(text_vector @ image_vector)
                 
                 candidates.append({
                     'time': t,
@@ -225,6 +413,46 @@ class SemanticMatcher:
         
         return matches
     
+    def _iter_frames(
+        self,
+        cap: cv2.VideoCapture,
+        fps: float,
+        start_time: float,
+        end_time: float,
+        sample_interval: float,
+        frame_bank: Optional[List[Tuple[float, bytes]]],
+        cached: Optional[Dict[int, np.ndarray]] = None
+    ) -> Iterator[Tuple[float, Optional[np.ndarray]]]:
+        """
+        按时间范围取采样帧：优先查预采样帧表，否则逐帧跳转读取
+        
+        cached 中已有向量的时间点不解码，返回 (t, None)
+        """
+        cached = cached or {}
+        if frame_bank is not None:
+            lo = bisect.bisect_left(frame_bank, (start_time,))
+            hi = bisect.bisect_left(frame_bank, (end_time,))
+            for t, jpeg in frame_bank[lo:hi]:
+                if _ts_key(t) in cached:
+                    yield t, None
+                    continue
+                frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is not None:
+                    yield t, frame
+            return
+        
+        for t in np.arange(start_time, end_time, sample_interval):
+            if _ts_key(t) in cached:
+                yield t, None
+                continue
+            frame_num = int(t * fps)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+            ret, frame = cap.read()
+            
+            if not ret or frame is None:
+                continue
+            yield t, frame
+    
     def _match_by_dialogue(
         self,
         transcript_segments: List[Dict],
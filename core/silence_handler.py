@@ -13,6 +13,7 @@ SmartVideoClipper - 静音处理器 v5.6
 - 语速调整作为辅助手段
 """
 
+import os
 import sys
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
@@ -23,6 +24,12 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 模型常驻时长（与解说引擎一致，多个阶段之间不重复加载模型）
+try:
+    from config import OLLAMA_KEEP_ALIVE
+except ImportError:
+    OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
 
 def log(msg: str):
     """统一日志输出"""
@@ -337,7 +344,8 @@ class SilenceHandler:
                 options={
                     'num_predict': 500,
                     'temperature': 0.5,
-                }
+                },
+                keep_alive=OLLAMA_KEEP_ALIVE
             )
             
             # v5.7.3: 只从content提取，绝不使用thinking
@@ -230,6 +230,73 @@ def concat_clips(clip_files: list, output_path: str):
     return output_path
 
 
+# 单进程截取+拼接的片段上限：每个片段是一路独立输入（各自解码器），过多会占用大量内存
+ONE_SHOT_MAX_CLIPS = 32
+
+
+def extract_and_concat(video_path: str, clips: list, output_path: str):
+    """
+    单次FFmpeg完成多片段截取和拼接
+    
+    每个片段用 -ss/-t 作为一路输入（输入端快速定位，不需要从头解码），
+    再用 concat 滤镜直接拼成一个文件：省去 N 次截取 + 1 次拼接的进程启动和中间文件
+    
+    参数:
+        video_path: 源视频
+        clips: [{'start': 10, 'end': 20}, ...]
+        output_path: 输出路径
+    
+    返回:
+        output_path（失败抛 RuntimeError，调用方可回退到 extract_clips + concat_clips）
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"[ERROR] 源视频不存在: {video_path}")
+    
+    spans = []
+    for clip in clips:
+        start = clip.get('start', 0)
+        end = clip.get('end', start + 10)
+        if end - start > 0:
+            spans.append((start, end - start))
+    
+    if not spans:
+        raise ValueError("[ERROR] 片段列表为空")
+    if len(spans) > ONE_SHOT_MAX_CLIPS:
+        raise RuntimeError(f"[ERROR] 片段过多({len(spans)})，不适合单进程拼接")
+    
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    cmd = ['ffmpeg', '-y']
+    for start, duration in spans:
+        cmd += ['-ss', str(start), '-t', str(duration), '-i', video_path]
+    
+    filter_complex = ''.join(
+        f'[{i}:v:0][{i}:a:0]' for i in range(len(spans))
+    ) + f'concat=n={len(spans)}:v=1:a=1[v][a]'
+    
+    cmd += [
+        '-filter_complex', filter_complex,
+        '-map', '[v]', '-map', '[a]',
+    ] + get_video_codec_args('fast') + [  # GPU加速编码
+        '-c:a', 'aac',
+        '-loglevel', 'error',
+        output_path
+    ]
+    
+    print(f"   单进程截取并拼接 {len(spans)} 个片段...")
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+    
+    if not os.path.exists(output_path) or os.path.getsize(output_path) < 1000:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise RuntimeError(f"[ERROR] 单进程拼接失败: {result.stderr[:200] if result.stderr else 'unknown'}")
+    
+    print(f"[OK] 视频截取拼接完成: {output_path}")
+    return output_path
+
+
 def parse_keep_original_markers(script: str) -> list:
     """解析文案中的【保留原声】标记"""
     patterns = [
@@ -25,6 +25,12 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 模型常驻时长（与解说引擎一致，多个阶段之间不重复加载模型）
+try:
+    from config import OLLAMA_KEEP_ALIVE
+except ImportError:
+    OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
 
 @dataclass
 class FrameworkSegment:
@@ -53,6 +59,9 @@ EMOTION_OPTIONS = ['紧张', '温情', '冲突', '悬疑', '高潮', '平静', '
 # 叙事目标选项
 NARRATIVE_GOALS = ['铺垫', '转折', '升级', '爆发', '收尾', '过渡', '揭秘']
 
+# 合并生成时剧情总结行的前缀
+_SUMMARY_PREFIX_RE = re.compile(r'^剧情[：:]\s*')
+
 
 def log(msg: str):
     """统一日志输出"""
@@ -153,6 +162,60 @@ class StoryFrameworkGenerator:
         log(f"[Framework] 使用规则生成框架")
         return self._rule_based_framework(scenes, media_type)
     
+    def generate_framework_with_summary(
+        self,
+        title: str,
+        media_type: str,
+        episode: int,
+        dialogues_text: str,
+        scenes: List[Dict],
+        total_episodes: int = 1
+    ) -> Tuple[str, Optional[List[FrameworkSegment]]]:
+        """
+        一次LLM调用同时生成剧情概要和故事框架
+        
+        没有现成剧情、需要先从对话总结剧情时使用，
+        省去"总结剧情→生成框架"两次串行调用
+        
+        参数：
+            dialogues_text: 用于总结剧情的对话文本
+            其余同generate_framework
+        
+        返回：(剧情概要, 框架段落列表)，失败返回("", None)
+        """
+        if not self.llm_model:
+            return "", None
+        
+        log("[Framework] ========== 剧情总结+框架生成 v5.6 ==========")
+        log(f"[Framework] 作品: {title}")
+        log(f"[Framework] 场景数: {len(scenes)}")
+        
+        try:
+            # 框架prompt与generate_framework共用，只把剧情概要换成对话、并要求先输出剧情总结
+            prompt = self._build_framework_prompt(
+                title, media_type, episode, len(scenes),
+                self._extract_scene_summaries(scenes),
+                f"【对话内容】\n{dialogues_text[:2000]}",
+                summary_first=True
+            )
+            content = self._chat(prompt, num_predict=2500)
+            if not content:
+                log("[Framework] AI返回content为空")
+                return "", None
+            
+            # 第一行是剧情总结，其后的JSON数组走与generate_framework相同的解析
+            summary = _SUMMARY_PREFIX_RE.sub('', content.split('[', 1)[0].strip()).strip()
+            framework = self._parse_framework_json(content, len(scenes))
+            if not summary or not framework:
+                return "", None
+            
+            log(f"[Framework] AI生成成功: {len(framework)}个段落")
+            return summary, framework
+            
+        except Exception as e:
+            log(f"[Framework] 剧情总结+框架生成异常: {e}")
+            return "", None
+    
     def _extract_scene_summaries(self, scenes: List[Dict]) -> List[str]:
         """提取场景摘要"""
         summaries = []
@@ -186,24 +249,62 @@ class StoryFrameworkGenerator:
             return None
         
         try:
-            import ollama
+            prompt = self._build_framework_prompt(
+                title, media_type, episode, total_scenes, scene_summaries,
+                f"【剧情概要】\n{plot_summary[:500] if plot_summary else '(无剧情概要)'}"
+            )
+            content = self._chat(prompt, num_predict=2000)
             
-            # 构建prompt
-            media_type_cn = "电视剧" if media_type == "tv" else "电影"
+            # v5.7.3: content为空返回None
+            if not content:
+                log("[Framework] AI返回content为空")
+                return None
             
-            # 只取部分场景摘要避免prompt过长
-            sample_scenes = scene_summaries[:30] if len(scene_summaries) > 30 else scene_summaries
-            scenes_text = "\n".join(sample_scenes)
+            # 解析JSON
+            return self._parse_framework_json(content, total_scenes)
             
-            prompt = f"""你是专业的电影解说文案策划师。请为以下剧集生成解说框架：
+        except Exception as e:
+            log(f"[Framework] AI生成异常: {e}")
+            return None
+    
+    @staticmethod
+    def _build_framework_prompt(
+        title: str,
+        media_type: str,
+        episode: int,
+        total_scenes: int,
+        scene_summaries: List[str],
+        context_block: str,
+        summary_first: bool = False
+    ) -> str:
+        """
+        构建框架生成prompt
+        
+        context_block为剧情概要或对话内容段落；summary_first时要求第一行先输出剧情总结
+        """
+        media_type_cn = "电视剧" if media_type == "tv" else "电影"
+        
+        # 只取部分场景摘要避免prompt过长
+        sample_scenes = scene_summaries[:30] if len(scene_summaries) > 30 else scene_summaries
+        scenes_text = "\n".join(sample_scenes)
+        
+        if summary_first:
+            task = "请先总结剧情，再为剧集生成解说框架："
+            output_head = "【输出格式】\n第一行：剧情：用100字总结对话的主要剧情\n第二行起：JSON数组"
+            output_tail = "先输出剧情总结，再直接输出JSON数组，不要其他解释："
+        else:
+            task = "请为以下剧集生成解说框架："
+            output_head = "【输出JSON格式】"
+            output_tail = "直接输出JSON数组，不要其他解释："
+        
+        return f"""你是专业的电影解说文案策划师。{task}
 
 【作品信息】
 - 名称：《{title}》第{episode}集
 - 类型：{media_type_cn}
 - 总场景数：{total_scenes}
 
-【剧情概要】
-{plot_summary[:500] if plot_summary else '(无剧情概要)'}
+{context_block}
 
 【部分场景摘要】
 {scenes_text}
@@ -215,54 +316,48 @@ class StoryFrameworkGenerator:
 4. 叙事目标可选：铺垫/转折/升级/爆发/收尾/过渡/揭秘
 5. 遵循"钩子开场→铺垫→冲突升级→高潮→悬念收尾"结构
 
-【输出JSON格式】
+{output_head}
 [
   {{"segment_id": 1, "theme": "开场悬念", "emotion": "悬疑", "narrative_goal": "铺垫", "key_point": "xxx", "scene_start": 1, "scene_end": 10}},
   {{"segment_id": 2, "theme": "xxx", "emotion": "xxx", "narrative_goal": "转折", "key_point": "xxx", "scene_start": 11, "scene_end": 20}},
   ...
 ]
 
-直接输出JSON数组，不要其他解释："""
-            
-            response = ollama.chat(
-                model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}],
-                options={
-                    'num_predict': 2000,
-                    'temperature': 0.4,
-                }
-            )
-            
-            # v5.7.3: 只从content提取，绝不使用thinking
-            msg = response.get('message', {})
-            content = ""
-            
-            if hasattr(msg, 'content') and msg.content:
-                content = msg.content.strip()
+{output_tail}"""
+    
+    def _chat(self, prompt: str, num_predict: int) -> str:
+        """调用LLM，只返回content（v5.7.3: 绝不使用thinking）"""
+        import ollama
+        from core.narration_engine import response_content
+        
+        response = ollama.chat(
+            model=self.llm_model,
+            messages=[{'role': 'user', 'content': prompt}],
+            options={
+                'num_predict': num_predict,
+                'temperature': 0.4,
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE
+        )
+        return response_content(response)
+    
+    def _parse_framework_json(self, content: str, total_scenes: int) -> Optional[List[FrameworkSegment]]:
+        """解析框架JSON（定位第一个完整JSON数组，数组后多余的文字不影响解析）"""
+        try:
+            from core.narration_engine import _extract_json_array
             
-            # v5.7.3: content为空返回None
-            if not content:
-                log("[Framework] AI返回content为空")
+            data = _extract_json_array(content)
+            if data is None:
                 return None
             
-            # 解析JSON
-            return self._parse_framework_json(content, total_scenes)
+            return self._build_segments(data, total_scenes)
             
-        except Exception as e:
-            log(f"[Framework] AI生成异常: {e}")
+        except Exception:
             return None
     
-    def _parse_framework_json(self, content: str, total_scenes: int) -> Optional[List[FrameworkSegment]]:
-        """解析框架JSON"""
+    def _build_segments(self, data, total_scenes: int) -> Optional[List[FrameworkSegment]]:
+        """将AI返回的JSON数组转换为框架段落"""
         try:
-            # 尝试找到JSON数组
-            match = re.search(r'\[[\s\S]*\]', content)
-            if not match:
-                return None
-            
-            json_str = match.group()
-            data = json.loads(json_str)
-            
             if not isinstance(data, list):
                 return None
             
@@ -290,8 +385,6 @@ class StoryFrameworkGenerator:
             
             return segments
             
-        except json.JSONDecodeError:
-            return None
         except Exception:
             return None
     
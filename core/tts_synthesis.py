@@ -12,6 +12,7 @@ import torch
 import edge_tts
 import asyncio
 import os
+import numpy as np
 
 # ChatTTS可选导入（如果安装失败，使用Edge-TTS替代）
 CHATTTS_AVAILABLE = False
@@ -22,6 +23,10 @@ try:
 except ImportError:
     print("[INFO] ChatTTS未安装，将使用Edge-TTS作为替代（效果也很好！）")
 
+# ChatTTS 输出采样率，以及批量合成时句间静音（秒）
+CHATTTS_SAMPLE_RATE = 24000
+SENTENCE_GAP = 0.2
+
 
 class TTSEngine:
     """语音合成引擎（支持ChatTTS和Edge-TTS）
@@ -73,8 +78,8 @@ class TTSEngine:
             print("   切换到Edge-TTS")
             self.engine = "edge"
     
-    def synthesize_chattts(self, text: str, output_path: str):
-        """使用ChatTTS合成"""
+    def _infer_chattts(self, texts):
+        """ChatTTS推理（texts 可为单条或列表，列表会在一次调用里批量推理）"""
         if not self.chat:
             raise RuntimeError("ChatTTS未初始化")
         
@@ -90,19 +95,21 @@ class TTSEngine:
             params_refine = ChatTTS.Chat.RefineTextParams(
                 prompt='[oral_2][laugh_0][break_5]'
             )
-            wavs = self.chat.infer(
-                text,
+            return self.chat.infer(
+                texts,
                 params_infer_code=params_infer,
                 params_refine_text=params_refine,
             )
         except AttributeError:
             # 旧版API兼容
-            wavs = self.chat.infer(
-                text,
+            return self.chat.infer(
+                texts,
                 use_decoder=True,
                 skip_refine_text=False,
             )
-        
+    
+    def _save_wav(self, wav, output_path: str):
+        """保存ChatTTS音频"""
         # 确保输出目录存在
         output_dir = os.path.dirname(output_path)
         if output_dir:
@@ -110,9 +117,40 @@ class TTSEngine:
         
         # 保存音频
         import torchaudio
-        torchaudio.save(output_path, torch.from_numpy(wavs[0]), 24000)
+        torchaudio.save(output_path, torch.from_numpy(wav), CHATTTS_SAMPLE_RATE)
+    
+    def synthesize_chattts(self, text: str, output_path: str):
+        """使用ChatTTS合成"""
+        wavs = self._infer_chattts(text)
+        self._save_wav(wavs[0], output_path)
         print(f"[OK] ChatTTS合成完成: {output_path}")
     
+    def synthesize_chattts_batch(self, sentences: list, output_path: str):
+        """
+        使用ChatTTS批量合成：所有句子一次推理，再按顺序拼接（句间插入短静音）
+        
+        参数:
+            sentences: 分好的句子列表
+            output_path: 输出音频路径
+        
+        返回:
+            每句占用的时长（秒，含句后静音），可直接累加作为字幕时间轴
+        """
+        wavs = self._infer_chattts(list(sentences))
+        gap = np.zeros((1, int(CHATTTS_SAMPLE_RATE * SENTENCE_GAP)), dtype=np.float32)
+        parts = []
+        durations = []
+        for wav in wavs:
+            if parts:
+                parts.append(gap)
+                durations[-1] += gap.shape[1] / CHATTTS_SAMPLE_RATE
+            wav = np.asarray(wav, dtype=np.float32).reshape(1, -1)
+            parts.append(wav)
+            durations.append(wav.shape[1] / CHATTTS_SAMPLE_RATE)
+        self._save_wav(np.concatenate(parts, axis=1), output_path)
+        print(f"[OK] ChatTTS批量合成完成: {len(wavs)}句 → {output_path}")
+        return durations
+    
     async def synthesize_edge(self, text: str, output_path: str, voice: str = "zh-CN-YunxiNeural"):
         """
         使用Edge-TTS合成（更稳定）
@@ -147,6 +185,28 @@ class TTSEngine:
         else:
             await self.synthesize_edge(text, output_path)
     
+    async def synthesize_batch(self, sentences: list, output_path: str):
+        """
+        按句批量合成（异步）
+        
+        ChatTTS 一次推理整批句子；Edge-TTS 是云端合成，合并为一次请求
+        
+        参数:
+            sentences: 分好的句子列表
+            output_path: 输出音频路径
+        
+        返回:
+            每句实际时长列表（ChatTTS）；Edge-TTS 整段合成拿不到分句时长，返回 None
+        """
+        sentences = [s for s in sentences if s and s.strip()]
+        if not sentences:
+            raise ValueError("没有可合成的文本")
+        
+        if self.engine == "chattts":
+            return self.synthesize_chattts_batch(sentences, output_path)
+        await self.synthesize_edge('\n'.join(sentences), output_path)
+        return None
+    
     def __del__(self):
         """清理资源"""
         if self.chat:
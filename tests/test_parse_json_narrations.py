@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+批量解说JSON解析测试：JSON模式下模型返回{"narrations": [...]}对象
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from narration_engine import parse_json_narrations
+
+
+def test_plain_array():
+    assert parse_json_narrations('["他终于说出真相", "她转身离开"]') == ["他终于说出真相", "她转身离开"]
+
+
+def test_json_mode_object():
+    content = '{"narrations": ["1. 他终于说出真相", "她转身离开"]}'
+    assert parse_json_narrations(content) == ["他终于说出真相", "她转身离开"]
+
+
+def test_stream_stopped_before_object_closes():
+    # 流式接收在数组闭合时即停止，对象的右括号尚未到达
+    assert parse_json_narrations('{"narrations": ["他终于说出真相", "她转身离开"]') == ["他终于说出真相", "她转身离开"]
+
+
+def test_invalid_returns_empty():
+    assert parse_json_narrations('好的，下面是解说') == []
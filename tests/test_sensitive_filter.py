@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+敏感词过滤测试：删除内层敏感词后拼出的新敏感词也要被删除
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from narration_engine import _filter_sensitive_impl
+
+
+def test_nested_sensitive_words_removed():
+    assert _filter_sensitive_impl("天安习近平门") == ""
+    assert _filter_sensitive_impl("台习近平独") == ""
+    assert _filter_sensitive_impl("他说台习近平独了") == "他说了"
+
+
+def test_plain_text_kept():
+    assert _filter_sensitive_impl("  今天天气不错  ") == "今天天气不错"
+    assert _filter_sensitive_impl("") == ""
@@ -120,21 +120,21 @@ if %errorLevel% equ 0 (
     for /f "tokens=2" %%v in ('python --version 2^>^&1') do set "PY_VER=%%v"
     echo    📌 检测到Python: !PY_VER!
     
-    :: 检查版本是否>=3.9
+    :: 检查版本是否>=3.10
     for /f "tokens=1,2 delims=." %%a in ("!PY_VER!") do (
         set /a "PY_MAJOR=%%a"
         set /a "PY_MINOR=%%b"
     )
     
     if !PY_MAJOR! geq 3 (
-        if !PY_MINOR! geq 9 (
+        if !PY_MINOR! geq 10 (
             set "PYTHON_OK=1"
-            echo %GREEN%✅ Python版本符合要求 (>=3.9)%RESET%
+            echo %GREEN%✅ Python版本符合要求 (>=3.10)%RESET%
         )
     )
     
     if !PYTHON_OK! equ 0 (
-        echo %YELLOW%⚠️  Python版本过低，需要3.9+%RESET%
+        echo %YELLOW%⚠️  Python版本过低，需要3.10+%RESET%
     )
 ) else (
     echo %YELLOW%⚠️  未检测到Python%RESET%